@@ -6,6 +6,17 @@
 #              Don't modify the contents of this file.
 
 
+import hashlib
+import zlib
+from bisect import bisect_left
+from time import perf_counter
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: batch hashing falls back to Python
+    np = None
+
+
 # -------------- Used by both HashMaps (SC & OA)  -------------- #
 
 class DynamicArrayException(Exception):
@@ -16,7 +27,7 @@ class DynamicArray:
     """
     Class implementing a Dynamic Array
     Supported methods are:
-    append, pop, swap, get_at_index, set_at_index, length
+    append, pop, swap, get_at_index, set_at_index, length, unchecked
     """
 
     def __init__(self, arr=None) -> None:
@@ -55,7 +66,7 @@ class DynamicArray:
 
     def get_at_index(self, index: int):
         """Return value of element at a given index."""
-        if index < 0 or index >= self.length():
+        if index < 0 or index >= len(self._data):
             raise DynamicArrayException
         return self._data[index]
 
@@ -65,7 +76,7 @@ class DynamicArray:
 
     def set_at_index(self, index: int, value: object) -> None:
         """Set value of element at a given index."""
-        if index < 0 or index >= self.length():
+        if index < 0 or index >= len(self._data):
             raise DynamicArrayException
         self._data[index] = value
 
@@ -77,6 +88,15 @@ class DynamicArray:
         """Return length of array."""
         return len(self._data)
 
+    def unchecked(self) -> list:
+        """
+        Return the list backing the array, for hot loops that read and write
+        elements in place. Indexing it skips the bounds check (and the method
+        calls) of get_at_index/set_at_index, so the caller must keep indices
+        within 0 <= index < length().
+        """
+        return self._data
+
 
 def hash_function_1(key: str) -> int:
     """Sample Hash function #1 to be used with HashMap implementation"""
@@ -96,6 +116,241 @@ def hash_function_2(key: str) -> int:
     return hash
 
 
+# Better distributed alternatives with the same str -> int signature. Any of
+# them can be passed as the function argument of either HashMap.
+# hash_function_1 and hash_function_2 only produce a narrow range of values
+# (and hash_function_1 maps every anagram to the same value).
+
+def hash_function_fnv1a(key: str) -> int:
+    """64-bit FNV-1a over the UTF-8 bytes of key; stable across processes"""
+    hash = 0xcbf29ce484222325
+    for byte in key.encode():
+        hash = ((hash ^ byte) * 0x100000001b3) & 0xFFFFFFFFFFFFFFFF
+    return hash
+
+
+def hash_function_crc32(key: str) -> int:
+    """CRC-32 of the UTF-8 bytes of key, computed in C; stable across processes"""
+    return zlib.crc32(key.encode())
+
+
+def hash_function_blake2b(key: str) -> int:
+    """64-bit BLAKE2b digest of the UTF-8 bytes of key; stable across processes"""
+    return int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little')
+
+
+def seeded_hash_function(seed: int = 0) -> callable:
+    """
+    Return a hash function built on the C-speed built-in hash, mixed with seed.
+    Note the built-in hash of str is randomized per process (PYTHONHASHSEED),
+    so its values must not be persisted or shared between processes.
+    """
+    def seeded_hash(key: str) -> int:
+        return hash((seed, key))
+    return seeded_hash
+
+
+# batches are hashed with NumPy this many keys at a time, and only keys of at
+# most _NUMPY_WIDTH characters (longer ones are hashed one by one), which
+# bounds the size of the code point array
+_NUMPY_CHUNK = 16384
+_NUMPY_WIDTH = 64
+
+
+def hash_many(function: callable, keys: list) -> list:
+    """
+    Return the hashes of a batch of keys, in order, as a list.
+    If NumPy is installed, batches of str keys hashed with hash_function_1 or
+    hash_function_2 are hashed in one vectorized pass over a 2-D array of
+    code points; the results are identical to the scalar functions.
+    """
+    if (np is None or len(keys) < 64
+            or (function is not hash_function_1 and function is not hash_function_2)
+            or not all(type(key) is str for key in keys)):
+        return list(map(function, keys))
+    if max(map(len, keys)) > _NUMPY_WIDTH:
+        # vectorize the short keys only: one long key would pad every row
+        short = [i for i, key in enumerate(keys) if len(key) <= _NUMPY_WIDTH]
+        hashes = [function(key) if len(key) > _NUMPY_WIDTH else 0 for key in keys]
+        for i, hash in zip(short, hash_many(function, [keys[i] for i in short])):
+            hashes[i] = hash
+        return hashes
+
+    hashes = []
+    for start in range(0, len(keys), _NUMPY_CHUNK):
+        chunk = keys[start:start + _NUMPY_CHUNK]
+        # fixed-width UTF-32 strings viewed as one row of code points per key;
+        # shorter keys are padded with zeros, which add nothing to either hash
+        strings = np.array(chunk, dtype=str)
+        width = strings.dtype.itemsize // 4
+        if width == 0:
+            hashes.extend([0] * len(chunk))
+            continue
+        codes = strings.view(np.uint32).reshape(len(chunk), width).astype(np.int64)
+        if function is hash_function_2:
+            # hash_function_2 weighs the i-th character by i + 1
+            codes *= np.arange(1, width + 1, dtype=np.int64)
+        hashes.extend(codes.sum(axis=1).tolist())
+    return hashes
+
+
+def indices_many(hashes: list, capacity: int, shift: int = None) -> list:
+    """
+    Return the bucket index of every hash in a list: hash % capacity, or, if
+    shift is given, the top 64 - shift bits of the 64-bit product of the
+    hash and the golden ratio constant (the Fibonacci hashing used by
+    power-of-two tables). Vectorized with NumPy when it is installed and the
+    hashes fit in 64 bits.
+    """
+    if np is not None and len(hashes) >= 64:
+        try:
+            try:
+                array = np.array(hashes, dtype=np.int64)
+            except OverflowError:
+                array = np.array(hashes, dtype=np.uint64)
+        except OverflowError:
+            array = None  # larger than 64 bits: fall back to Python ints
+        if array is not None:
+            if shift is None:
+                return (array % capacity).tolist()
+            if shift >= 64:
+                return [0] * len(hashes)
+            # uint64 arithmetic wraps around, i.e. works modulo 2^64
+            product = array.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+            return (product >> np.uint64(shift)).tolist()
+
+    if shift is None:
+        return [hash % capacity for hash in hashes]
+    return [((hash * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> shift
+            for hash in hashes]
+
+
+class HashMapStats:
+    """
+    Counters kept up to date by a HashMap built with stats=True (read them
+    with its get_stats). lengths[n] is the number of buckets holding n nodes
+    (SC) or of lookups that probed n slots (OA).
+    """
+
+    __slots__ = ('lengths', 'max_length', 'hash_calls', 'resize_seconds',
+                 '_resize_depth', '_resize_start')
+
+    def __init__(self, buckets: int = 0) -> None:
+        """Initialize counters for a table of buckets empty buckets"""
+        self.lengths = [buckets]
+        self.max_length = 0
+        self.hash_calls = 0
+        self.resize_seconds = 0.0
+        self._resize_depth = 0  # resize calls in progress (they nest)
+        self._resize_start = 0.0
+
+    def count(self, length: int) -> None:
+        """Count one more bucket (or lookup) of the given length"""
+        lengths = self.lengths
+        while len(lengths) <= length:
+            lengths.append(0)
+        lengths[length] += 1
+        if length > self.max_length:
+            self.max_length = length
+
+    def uncount(self, length: int) -> None:
+        """Count one bucket of the given length less"""
+        self.lengths[length] -= 1
+        while self.max_length and not self.lengths[self.max_length]:
+            self.max_length -= 1
+
+    def resize_started(self) -> None:
+        """Start timing a resize (nested calls are timed once, by the outermost)"""
+        if self._resize_depth == 0:
+            self._resize_start = perf_counter()
+        self._resize_depth += 1
+
+    def resize_finished(self) -> None:
+        """Stop timing a resize started by resize_started"""
+        self._resize_depth -= 1
+        if self._resize_depth == 0:
+            self.resize_seconds += perf_counter() - self._resize_start
+
+    def histogram(self) -> dict:
+        """Return {length: count} for every length with a non-zero count"""
+        return {length: count for length, count in enumerate(self.lengths) if count}
+
+
+# Ladder of prime capacities: each one is the smallest prime >= twice the
+# previous, i.e. exactly what doubling the default capacity of 11 yields.
+PRIME_CAPACITIES = (
+    11, 23, 47, 97, 197, 397, 797, 1597, 3203, 6421, 12853, 25717, 51437,
+    102877, 205759, 411527, 823117, 1646237, 3292489, 6584983, 13169977,
+    26339969, 52679969, 105359939, 210719881, 421439783, 842879579,
+    1685759167, 3371518343, 6743036717, 13486073473, 26972146961,
+    53944293929, 107888587883, 215777175787, 431554351609, 863108703229,
+    1726217406467, 3452434812973, 6904869625999, 13809739252051,
+    27619478504183, 55238957008387, 110477914016779, 220955828033581,
+    441911656067171,
+)
+
+# Miller-Rabin with the first 13 prime bases is deterministic for
+# n < _MILLER_RABIN_LIMIT (about 3.3 * 10^24)
+_MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+_MILLER_RABIN_LIMIT = 3317044064679887385961981
+
+
+def is_prime(n: int) -> bool:
+    """
+    Deterministic Miller-Rabin primality test for any realistic capacity.
+    Raises ValueError for n >= _MILLER_RABIN_LIMIT, where it would not be.
+    """
+    if n >= _MILLER_RABIN_LIMIT:
+        raise ValueError("is_prime is only deterministic below 3317044064679887385961981")
+    if n < 2:
+        return False
+    for base in _MILLER_RABIN_BASES:
+        if n % base == 0:
+            return n == base
+
+    # write n - 1 as d * 2^s with d odd
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for base in _MILLER_RABIN_BASES:
+        x = pow(base, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def next_prime(n: int) -> int:
+    """
+    Return the smallest prime >= n.
+    Answered straight from PRIME_CAPACITIES when n lies between twice a
+    ladder prime and the next ladder prime (always the case when a table on
+    the ladder doubles), otherwise by testing odd numbers with is_prime.
+    """
+    index = bisect_left(PRIME_CAPACITIES, n)
+    if (0 < index < len(PRIME_CAPACITIES)
+            and n >= 2 * PRIME_CAPACITIES[index - 1]):
+        return PRIME_CAPACITIES[index]
+    if index < len(PRIME_CAPACITIES) and PRIME_CAPACITIES[index] == n:
+        return n
+
+    if n <= 2:
+        return 2
+    if n % 2 == 0:
+        n += 1
+    while not is_prime(n):
+        n += 2
+    return n
+
+
 # --------- For use in Separate Chaining (SC) HashMap  --------- #
 
 class SLNode:
@@ -103,11 +358,19 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
+    # no per-instance __dict__: keeps every stored pair compact
+    __slots__ = ('key', 'value', 'next', 'hash')
+
+    def __init__(self, key: str, value: object, next: "SLNode" = None,
+                 hash: int = None) -> None:
+        """
+        Initialize node given a key and value.
+        hash caches the full hash of key so it never has to be recomputed.
+        """
         self.key = key
         self.value = value
         self.next = next
+        self.hash = hash
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -119,6 +382,8 @@ class LinkedListIterator:
     Separate iterator class for LinkedList
     """
 
+    __slots__ = ('_node',)
+
     def __init__(self, current_node: SLNode) -> None:
         """Initialize the iterator with a node."""
         self._node = current_node
@@ -141,9 +406,13 @@ class LinkedListIterator:
 class LinkedList:
     """
     Class implementing a Singly Linked List
-    Supported methods are: insert, remove, contains, length, iterator
+    Supported methods are: insert, insert_node, remove, contains, length,
+    iterator
     """
 
+    # one list per SC bucket, so keep it free of a per-instance __dict__
+    __slots__ = ('_head', '_size')
+
     def __init__(self) -> None:
         """
         Initialize new linked list;
@@ -168,20 +437,31 @@ class LinkedList:
         """Return an iterator for the list, starting at the head."""
         return LinkedListIterator(self._head)
 
-    def insert(self, key: str, value: object) -> None:
-        """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
+    def insert(self, key: str, value: object, hash: int = None) -> None:
+        """Insert new node (caching the key's hash, if given) at front of the list."""
+        self._head = SLNode(key, value, self._head, hash)
+        self._size += 1
+
+    def insert_node(self, node: SLNode) -> None:
+        """
+        Link an existing node in at the front of the list.
+        The node must not belong to another list anymore; used to move
+        nodes between lists without allocating new ones.
+        """
+        node.next = self._head
+        self._head = node
         self._size += 1
 
-    def remove(self, key: str) -> bool:
+    def remove(self, key: str, hash: int = None) -> bool:
         """
         Remove first node with matching key.
+        If hash is given, only nodes with that cached hash are compared by key.
         Return True if removal was successful, False otherwise.
         """
         previous, node = None, self._head
         while node:
 
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 if previous:
                     previous.next = node.next
                 else:
@@ -192,11 +472,14 @@ class LinkedList:
             previous, node = node, node.next
         return False
 
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
+    def contains(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        If hash is given, only nodes with that cached hash are compared by key.
+        """
         node = self._head
         while node:
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 return node
             node = node.next
         return node
@@ -210,10 +493,17 @@ class LinkedList:
 
 class HashEntry:
 
-    def __init__(self, key: str, value: object) -> None:
-        """Initialize an entry for use in a hash map."""
+    # no per-instance __dict__: keeps every stored pair compact
+    __slots__ = ('key', 'value', 'hash', 'is_tombstone')
+
+    def __init__(self, key: str, value: object, hash: int = None) -> None:
+        """
+        Initialize an entry for use in a hash map.
+        hash caches the full hash of key so it never has to be recomputed.
+        """
         self.key = key
         self.value = value
+        self.hash = hash
 
         # Set this value to True when you "delete" a HashEntry
         self.is_tombstone = False
@@ -0,0 +1,245 @@
+# Course: CS261 - Data Structures
+# Assignment: Assignment 6: HashMap Implementation
+# Description: An asyncio wrapper around the separate chaining (hash_map_sc.py) and open addressing (hash_map_oa.py)
+# hash maps for use inside an event loop. Single-key calls stay cheap, while bulk operations, whole-table scans and
+# resizes work through the table a chunk of buckets at a time and yield to the loop in between, so no call stalls it
+# for long.
+
+
+import asyncio
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_1
+
+
+# map modules the wrapped HashMap can be built from
+MAP_TYPES = {'sc': hash_map_sc, 'oa': hash_map_oa}
+
+
+class AsyncHashMap:
+    def __init__(self,
+                 map_type: str = 'sc',
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 chunk: int = 1000,
+                 **options) -> None:
+        """
+        Initialize a map_type ('sc' or 'oa') HashMap with capacity, function
+        and any further keyword options, for use from coroutines of one
+        event loop. The map resizes incrementally (incremental_resize, on
+        unless passed as False), so a put that grows it only allocates the
+        new table. Bulk operations, scans and explicit resizes process chunk
+        buckets (or keys) at a time and yield to the loop after each chunk.
+        get and contains_key are plain methods; everything that changes the
+        map is a coroutine, serialized by a lock so that scans see the table
+        as of their start.
+        """
+        if map_type not in MAP_TYPES:
+            raise ValueError(f"map_type must be one of {tuple(MAP_TYPES)}")
+        if chunk < 1:
+            raise ValueError("chunk must be at least 1")
+        options.setdefault('incremental_resize', True)
+        self._map = MAP_TYPES[map_type].HashMap(capacity, function, **options)
+        self._chunk = chunk
+        self._lock = asyncio.Lock()
+
+    async def _finish_resize(self) -> None:
+        """Complete the incremental resize in progress, if any, a chunk of buckets at a time"""
+        while self._map._old_table is not None:
+            self._map._migrate(self._chunk)
+            await asyncio.sleep(0)
+
+    async def _bucket_chunks(self):
+        """
+        Yield the buckets of the table a list of chunk buckets at a time,
+        letting the loop run in between. The lock must be held, so the table
+        cannot change meanwhile.
+        """
+        await self._finish_resize()
+        buckets = self._map._buckets.unchecked()
+        for start in range(0, len(buckets), self._chunk):
+            yield buckets[start:start + self._chunk]
+            await asyncio.sleep(0)
+
+    def _is_empty(self, bucket) -> bool:
+        """Return True if a bucket (SC) or slot (OA) holds no live entry"""
+        if isinstance(self._map, hash_map_sc.HashMap):
+            return bucket.length() == 0
+        return bucket is None or bucket.is_tombstone is True
+
+    # ------------------------------------------------------------------ #
+
+    def get_size(self) -> int:
+        """Return size of map"""
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """Return capacity of map"""
+        return self._map.get_capacity()
+
+    def table_load(self, include_tombstones: bool = False) -> float:
+        """Return the current load factor of the map (see HashMap.table_load)"""
+        return self._map.table_load(include_tombstones)
+
+    def get_resize_count(self) -> int:
+        """Return the number of times the table has been resized"""
+        return self._map.get_resize_count()
+
+    def get_stats(self) -> dict:
+        """Return the statistics of a map built with stats=True (see HashMap.get_stats)"""
+        return self._map.get_stats()
+
+    def get(self, key: str):
+        """Return the value of key, or None if it is not in the map"""
+        return self._map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """Return True if key is in the map"""
+        return self._map.contains_key(key)
+
+    async def put(self, key: str, value: object) -> None:
+        """Add a key/value pair, or update its value"""
+        async with self._lock:
+            self._map.put(key, value)
+
+    async def remove(self, key: str) -> None:
+        """Remove key from the map, if it is there"""
+        async with self._lock:
+            self._map.remove(key)
+
+    async def put_many(self, pairs) -> None:
+        """Put every (key, value) pair of an iterable, yielding to the loop after every chunk of pairs"""
+        async with self._lock:
+            pairs = list(pairs)
+            for start in range(0, len(pairs), self._chunk):
+                # single puts: a batch put would complete any resize at once
+                for key, value in pairs[start:start + self._chunk]:
+                    self._map.put(key, value)
+                await asyncio.sleep(0)
+
+    async def get_many(self, keys) -> list:
+        """
+        Return a list with the value of every key of an iterable, in order
+        (None for missing keys), yielding to the loop after every chunk of keys
+        """
+        keys = list(keys)
+        values = []
+        for start in range(0, len(keys), self._chunk):
+            # a batch get completes any resize in progress: do that in chunks first
+            await self._finish_resize()
+            values.extend(self._map.get_many(keys[start:start + self._chunk]))
+            await asyncio.sleep(0)
+        return values
+
+    async def remove_many(self, keys) -> None:
+        """Remove every key of an iterable, yielding to the loop after every chunk of keys"""
+        async with self._lock:
+            keys = list(keys)
+            for start in range(0, len(keys), self._chunk):
+                for key in keys[start:start + self._chunk]:
+                    self._map.remove(key)
+                await asyncio.sleep(0)
+
+    async def resize_table(self, new_capacity: int) -> None:
+        """
+        Change the capacity of the table as HashMap.resize_table does,
+        moving the entries a chunk of buckets at a time
+        """
+        async with self._lock:
+            await self._finish_resize()
+            self._map.resize_table(new_capacity)  # only allocates the new table
+            await self._finish_resize()
+
+    async def reserve(self, count: int) -> None:
+        """Grow the table, if needed, so that it holds count entries without resizing (see HashMap.reserve)"""
+        async with self._lock:
+            await self._finish_resize()
+            self._map.reserve(count)
+            await self._finish_resize()
+
+    async def clear(self) -> None:
+        """Remove all key/value pairs from the map"""
+        async with self._lock:
+            self._map.clear()
+
+    async def empty_buckets(self) -> int:
+        """Return the number of empty buckets (kept by the map, once any resize has been migrated in chunks)"""
+        async with self._lock:
+            await self._finish_resize()
+            return self._map.empty_buckets()
+
+    async def get_bucket_counts(self) -> dict:
+        """Return the number of empty, occupied and tombstoned buckets (see HashMap.get_bucket_counts)"""
+        async with self._lock:
+            await self._finish_resize()
+            return self._map.get_bucket_counts()
+
+    async def get_keys_and_values(self) -> DynamicArray:
+        """Return a DynamicArray of all (key, value) tuples, collected a chunk of buckets at a time"""
+        async with self._lock:
+            pairs = []
+            async for buckets in self._bucket_chunks():
+                if isinstance(self._map, hash_map_sc.HashMap):
+                    pairs.extend((node.key, node.value) for bucket in buckets for node in bucket)
+                else:
+                    pairs.extend((entry.key, entry.value) for entry in buckets if not self._is_empty(entry))
+            return DynamicArray(pairs)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import random
+
+    async def examples() -> None:
+        print("\nAsync - put/get/remove example 1")
+        print("--------------------------------")
+        m = AsyncHashMap('sc', 53, hash_function_1, chunk=16)
+        for i in range(150):
+            await m.put('str' + str(i), i * 100)
+            if i % 25 == 24:
+                print(await m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+        await m.remove('str0')
+        print(m.get('str0'), m.get('str1'), m.contains_key('str1'), m.get_size())
+
+        print("\nAsync - concurrent tasks during a resize")
+        print("----------------------------------------")
+        # writers, readers and a resize interleave at every chunk; the result
+        # must match a plain dict given the same writes
+        for map_type in MAP_TYPES:
+            m = AsyncHashMap(map_type, 11, hash_function_1, chunk=7)
+            expected = {}
+            await m.put_many(('k' + str(i), i) for i in range(500))
+            expected.update(('k' + str(i), i) for i in range(500))
+            misses = 0
+
+            async def writer(t: int) -> None:
+                rnd = random.Random(t)
+                for _ in range(300):
+                    key = 'k' + str(rnd.randrange(1000))
+                    if rnd.random() < 0.7:
+                        await m.put(key, t)
+                        expected[key] = t
+                    else:
+                        await m.remove(key)
+                        expected.pop(key, None)
+
+            async def reader() -> None:
+                nonlocal misses
+                for _ in range(50):
+                    keys = ['k' + str(i) for i in range(0, 1000, 9)]
+                    values = await m.get_many(keys)
+                    # the writers may run between chunks: only compare
+                    # against the dict right after a single lookup
+                    misses += sum(m.get(key) != expected.get(key) for key in keys)
+                    await asyncio.sleep(0)
+                    assert len(values) == len(keys)
+
+            await asyncio.gather(writer(1), writer(2), reader(), m.resize_table(4000), m.reserve(6000))
+            pairs = await m.get_keys_and_values()
+            found = {pairs[i][0]: pairs[i][1] for i in range(pairs.length())}
+            print(map_type, "lost reads:", misses, "contents match:", found == expected,
+                  "size matches:", m.get_size() == len(expected), "capacity:", m.get_capacity())
+
+    asyncio.run(examples())
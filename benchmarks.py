@@ -0,0 +1,1042 @@
+# Course: CS261 - Data Structures
+# Assignment: Assignment 6: HashMap Implementation
+# Description: Micro-benchmarks for the separate chaining (hash_map_sc.py) and open addressing (hash_map_oa.py) hash maps.
+# Run all benchmarks with "python benchmarks.py", or pass one or more benchmark names to run only those,
+# e.g. "python benchmarks.py sc_growth". Timings are wall-clock and only meaningful relative to each other.
+
+
+import asyncio
+import cProfile
+import csv
+import gc
+import itertools
+import multiprocessing
+import os
+import pstats
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import async_hash_map
+import concurrent_hash_map
+import hash_map_oa
+import hash_map_sc
+import sharded_hash_map
+import shared_hash_map
+import snapshot
+import stream_loader
+from a6_include import (PRIME_CAPACITIES, DynamicArray, HashEntry, SLNode,
+                        hash_function_1, hash_function_2, hash_function_blake2b,
+                        hash_function_crc32, hash_function_fnv1a, hash_many,
+                        indices_many, next_prime, seeded_hash_function)
+
+
+def _keys(n: int, prefix: str = 'key') -> list:
+    """Return n distinct string keys."""
+    return [prefix + str(i) for i in range(n)]
+
+
+def bench_sc_growth(max_exponent: int = 6) -> None:
+    """
+    Per-operation put/get latency of the SC map started at the default capacity, for 10^2 up to 10^max_exponent keys.
+    With load-factor-driven growth the per-op cost should stay flat as n grows. The built-in hash is used so that the
+    narrow value range of hash_function_1/hash_function_2 does not dominate the result.
+    """
+    print(f"{'n':>10} {'capacity':>10} {'put ns/op':>10} {'get ns/op':>10}")
+    for exponent in range(2, max_exponent + 1):
+        n = 10 ** exponent
+        keys = _keys(n)
+        m = hash_map_sc.HashMap(function=hash)
+
+        start = time.perf_counter()
+        for key in keys:
+            m.put(key, key)
+        put_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for key in keys:
+            m.get(key)
+        get_time = time.perf_counter() - start
+
+        print(f"{n:>10} {m.get_capacity():>10} "
+              f"{put_time / n * 1e9:>10.0f} {get_time / n * 1e9:>10.0f}")
+
+
+def bench_sc_resize(max_exponent: int = 6) -> None:
+    """
+    Time a single SC resize_table (doubling) for 10^3 up to 10^max_exponent stored keys. A linear rehash keeps the
+    cost per entry flat. The "one chain" column puts up to 10^4 keys into a single bucket, where a rehash that
+    re-puts (and re-checks) every node would be quadratic.
+    """
+    print(f"{'n':>10} {'ns/entry':>10} {'one chain ns/entry':>20}")
+    for exponent in range(3, max_exponent + 1):
+        n = 10 ** exponent
+        keys = _keys(n)
+        # a very high max load factor keeps put from resizing on its own
+        m = hash_map_sc.HashMap(n, hash, max_load_factor=float('inf'))
+        for key in keys:
+            m.put(key, key)
+        start = time.perf_counter()
+        m.resize_table(2 * m.get_capacity())
+        resize_time = time.perf_counter() - start
+
+        chain = ''
+        if exponent <= 4:
+            m = hash_map_sc.HashMap(11, lambda key: 0,
+                                    max_load_factor=float('inf'))
+            for key in keys:
+                m.get_buckets()[0].insert(key, key, 0)  # skip put's chain walk
+            m._size = n
+            start = time.perf_counter()
+            m.resize_table(23)
+            chain = f"{(time.perf_counter() - start) / n * 1e9:.0f}"
+
+        print(f"{n:>10} {resize_time / n * 1e9:>10.0f} {chain:>20}")
+
+
+def bench_cached_hash_resize(n: int = 20000) -> None:
+    """
+    Resize cost per entry for short and long string keys hashed with hash_function_2. With cached hashes a resize
+    never calls the hash function, so its cost does not depend on key length.
+    """
+    calls = 0
+
+    def counting_hash(key: str) -> int:
+        nonlocal calls
+        calls += 1
+        return hash_function_2(key)
+
+    print(f"{'map':>4} {'key length':>10} {'ns/entry':>10} {'hash calls':>10}")
+    for name, module in (('SC', hash_map_sc), ('OA', hash_map_oa)):
+        for length in (8, 64, 512):
+            keys = [str(i).rjust(length, 'x') for i in range(n)]
+            m = module.HashMap(4 * n, counting_hash)
+            for key in keys:
+                m.put(key, key)
+            calls = 0
+            start = time.perf_counter()
+            m.resize_table(2 * m.get_capacity())
+            resize_time = time.perf_counter() - start
+            print(f"{name:>4} {length:>10} {resize_time / n * 1e9:>10.0f} {calls:>10}")
+
+
+class _DictSLNode:
+    """SLNode with a per-instance __dict__, i.e. the layout before __slots__."""
+
+    def __init__(self, key, value, next=None, hash=None):
+        self.key, self.value, self.next, self.hash = key, value, next, hash
+
+
+class _DictHashEntry:
+    """HashEntry with a per-instance __dict__, i.e. the layout before __slots__."""
+
+    def __init__(self, key, value, hash=None):
+        self.key, self.value, self.hash = key, value, hash
+        self.is_tombstone = False
+
+
+def _traced_bytes(build) -> int:
+    """Return the bytes still allocated by build() once it returns (its result is kept alive while measuring)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return used
+
+
+def bench_entry_memory(n: int = 100000) -> None:
+    """
+    tracemalloc bytes per stored entry: slotted SLNode/HashEntry against the old __dict__ layout, and whole maps.
+    Keys and values are shared ints so only the per-entry overhead is measured.
+    """
+    values = list(range(n))
+    print(f"{'layout':>24} {'bytes/entry':>12}")
+    for name, build in (
+            ('SLNode (slots)', lambda: [SLNode(v, v, None, v) for v in values]),
+            ('SLNode (dict)', lambda: [_DictSLNode(v, v, None, v) for v in values]),
+            ('HashEntry (slots)', lambda: [HashEntry(v, v, v) for v in values]),
+            ('HashEntry (dict)', lambda: [_DictHashEntry(v, v, v) for v in values])):
+        # subtract the list holding the objects
+        used = _traced_bytes(build) - _traced_bytes(lambda: [None for _ in values])
+        print(f"{name:>24} {used / n:>12.1f}")
+
+    def build_map(module):
+        m = module.HashMap(2 * n, int)
+        for v in values:
+            m.put(v, v)
+        return m
+
+    for name, module in (('SC HashMap', hash_map_sc), ('OA HashMap', hash_map_oa)):
+        print(f"{name:>24} {_traced_bytes(lambda: build_map(module)) / n:>12.1f}")
+
+
+def _realistic_key_sets(n: int) -> dict:
+    """Return named lists of about n keys that resemble real workloads."""
+    rnd = random.Random(261)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return {
+        'sequential ids': ['user:' + str(i) for i in range(n)],
+        'random words': list({''.join(rnd.choices(letters, k=rnd.randint(5, 12)))
+                              for _ in range(n)}),
+        'url paths': ['/api/v1/items/' + str(rnd.randrange(10 ** 9)) + '/details'
+                      for _ in range(n)],
+        'anagrams': list(itertools.islice(
+            (''.join(p) for p in itertools.permutations('abcdefghij')), n)),
+    }
+
+
+def bench_hash_functions(n: int = 50000) -> None:
+    """
+    Time per hash and distribution quality of every hash function on realistic key sets. Chains are measured
+    for a table whose capacity is the first prime >= n (load factor about 1): "distinct" is the fraction of
+    distinct hash values, "max chain" the longest chain and "avg chain" the mean length of non-empty chains.
+    """
+    functions = {
+        'hash_function_1': hash_function_1,
+        'hash_function_2': hash_function_2,
+        'fnv1a': hash_function_fnv1a,
+        'crc32': hash_function_crc32,
+        'blake2b': hash_function_blake2b,
+        'seeded builtin': seeded_hash_function(261),
+    }
+    capacity = hash_map_sc.HashMap(n).get_capacity()
+    for set_name, keys in _realistic_key_sets(n).items():
+        print(f"\n{set_name} ({len(keys)} keys)")
+        print(f"{'function':>16} {'ns/hash':>8} {'distinct':>9} {'max chain':>10} {'avg chain':>10}")
+        for name, function in functions.items():
+            start = time.perf_counter()
+            hashes = [function(key) for key in keys]
+            elapsed = time.perf_counter() - start
+            chains = Counter(h % capacity for h in hashes)
+            print(f"{name:>16} {elapsed / len(keys) * 1e9:>8.0f} "
+                  f"{len(set(hashes)) / len(keys):>9.3f} {max(chains.values()):>10} "
+                  f"{len(keys) / len(chains):>10.2f}")
+
+
+def bench_power_of_two(n: int = 100000) -> None:
+    """
+    Compare prime-capacity and power-of-two (bitmask) tables for both maps: time to grow from the default
+    capacity by repeated put (which includes every resize), time of one explicit doubling, and get latency.
+    Keys are hashed with hash_function_crc32 so that chain/probe lengths are comparable in both modes.
+    """
+    keys = _keys(n)
+    print(f"{'map':>4} {'mode':>12} {'capacity':>10} {'build ms':>9} {'resize ms':>10} {'get ns/op':>10}")
+    for name, module in (('SC', hash_map_sc), ('OA', hash_map_oa)):
+        for power_of_two in (False, True):
+            m = module.HashMap(11, hash_function_crc32, power_of_two=power_of_two)
+            start = time.perf_counter()
+            for key in keys:
+                m.put(key, key)
+            build_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for key in keys:
+                m.get(key)
+            get_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            m.resize_table(2 * m.get_capacity())
+            resize_time = time.perf_counter() - start
+
+            mode = 'power of two' if power_of_two else 'prime'
+            print(f"{name:>4} {mode:>12} {m.get_capacity():>10} {build_time * 1e3:>9.0f} "
+                  f"{resize_time * 1e3:>10.0f} {get_time / n * 1e9:>10.0f}")
+
+
+def bench_next_prime(max_exponent: int = 12) -> None:
+    """
+    Time to pick a prime capacity near 10^k: the original trial-division HashMap._next_prime against
+    a6_include.next_prime, both for an arbitrary (odd) requested capacity and for doubling a table whose
+    capacity is on the precomputed ladder (the growth path of a map started at the default capacity).
+    """
+    m = hash_map_sc.HashMap()
+    print(f"{'capacity':>14} {'trial division us':>17} {'miller-rabin us':>16} {'ladder us':>10}")
+    for exponent in range(4, max_exponent + 1, 2):
+        request = 10 ** exponent + 1
+        ladder_request = 2 * max(p for p in PRIME_CAPACITIES if p <= 10 ** exponent)
+
+        start = time.perf_counter()
+        m._next_prime(request)
+        trial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        next_prime(request)
+        fast_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        next_prime(ladder_request)
+        ladder_time = time.perf_counter() - start
+
+        print(f"{request:>14} {trial_time * 1e6:>17.0f} {fast_time * 1e6:>16.1f} {ladder_time * 1e6:>10.1f}")
+
+
+def _oa_probe_length(m: hash_map_oa.HashMap, key: str) -> int:
+    """Return the number of slots a lookup of key inspects in an OA map (mirrors HashMap._find_slot)."""
+    buckets, capacity = m._buckets, m.get_capacity()
+    hash = m._hash_function(key)
+    index, step = m._bucket_index(hash), m._first_step(hash)
+    j = 0
+    while j < capacity and buckets[index] is not None:
+        entry = buckets[index]
+        j += 1
+        if not entry.is_tombstone and entry.key == key:
+            break
+        if m._probing == 'robin_hood' and (index - m._bucket_index(entry.hash)) % capacity < j - 1:
+            break
+        index = (index + step) % capacity
+        step += m._step_increment
+    return max(j, 1)
+
+
+def bench_oa_churn(live: int = 5000, rounds: int = 8, ops_per_round: int = 20000) -> None:
+    """
+    Session-cache style churn on the OA map: keep about `live` keys, and every op inserts a new key and removes
+    the oldest one. After each round, report probe lengths for hits and misses, the tombstone count and the
+    capacity. With tombstone reuse and compaction these stay flat instead of growing with every round.
+    """
+    m = hash_map_oa.HashMap(11, hash_function_crc32)
+    for i in range(live):
+        m.put('session' + str(i), i)
+    oldest, newest = 0, live
+    misses = _keys(2000, 'missing')
+
+    print(f"{'round':>6} {'capacity':>9} {'tombstones':>11} {'avg hit':>8} {'avg miss':>9} "
+          f"{'max miss':>9} {'miss ns/op':>11}")
+    for round_number in range(1, rounds + 1):
+        for _ in range(ops_per_round):
+            m.put('session' + str(newest), newest)
+            m.remove('session' + str(oldest))
+            newest += 1
+            oldest += 1
+
+        hits = ['session' + str(i) for i in range(oldest, newest, max(1, live // 2000))]
+        hit_lengths = [_oa_probe_length(m, key) for key in hits]
+        miss_lengths = [_oa_probe_length(m, key) for key in misses]
+        start = time.perf_counter()
+        for key in misses:
+            m.get(key)
+        miss_time = time.perf_counter() - start
+        print(f"{round_number:>6} {m.get_capacity():>9} {m._tombstones:>11} "
+              f"{sum(hit_lengths) / len(hit_lengths):>8.2f} {sum(miss_lengths) / len(miss_lengths):>9.2f} "
+              f"{max(miss_lengths):>9} {miss_time / len(misses) * 1e9:>11.0f}")
+
+
+class _DoubleProbeOAMap(hash_map_oa.HashMap):
+    """OA map with the original contains_key (via get) and remove (contains_key, then a second walk)."""
+
+    def contains_key(self, key: str) -> bool:
+        if self._size == 0:
+            return False
+        return self.get(key) is not None
+
+    def remove(self, key: str) -> None:
+        hash = self._hash_function(key)
+        index, step = self._bucket_index(hash), self._first_step(hash)
+        if self.contains_key(key):
+            while (self._buckets[index].is_tombstone or self._buckets[index].hash != hash
+                   or self._buckets[index].key != key):
+                index = (index + step) % self._capacity
+                step += self._step_increment
+            self._buckets[index].is_tombstone = True
+            self._size -= 1
+            self._tombstones += 1
+
+
+def bench_oa_single_probe(n: int = 50000) -> None:
+    """
+    contains_key and remove on hit-heavy (stored keys) and miss-heavy (absent keys) workloads: the original
+    double probe walk against the single _find_slot walk. contains_key already walked once (through get), so
+    only remove should speed up there; the change to contains_key is that None values now count as stored.
+    """
+    keys = _keys(n)
+    missing = _keys(n, 'missing')
+    print(f"{'operation':>22} {'double ns/op':>13} {'single ns/op':>13} {'speedup':>8}")
+    for operation, workload in (('contains_key (hits)', keys), ('contains_key (misses)', missing),
+                                ('remove (hits)', keys), ('remove (misses)', missing)):
+        times = []
+        for cls in (_DoubleProbeOAMap, hash_map_oa.HashMap):
+            m = cls(2 * n, hash_function_crc32)
+            for key in keys:
+                m.put(key, key)
+            method = m.contains_key if operation.startswith('contains_key') else m.remove
+            start = time.perf_counter()
+            for key in workload:
+                method(key)
+            times.append((time.perf_counter() - start) / n * 1e9)
+        print(f"{operation:>22} {times[0]:>13.0f} {times[1]:>13.0f} {times[0] / times[1]:>7.2f}x")
+
+
+def bench_oa_probing(capacity: int = 20011, lookups: int = 20000) -> None:
+    """
+    Average and maximum probe length (hits and misses) and get ops/sec for every OA probing strategy, with the
+    table filled to load factors from 0.3 to 0.9 (max_load_factor is raised so the table never grows).
+    """
+    print(f"{'probing':>15} {'load':>5} {'avg hit':>8} {'max hit':>8} {'avg miss':>9} {'max miss':>9} "
+          f"{'hit ops/s':>10} {'miss ops/s':>11}")
+    missing = _keys(lookups, 'missing')
+    for probing in hash_map_oa.PROBING_STRATEGIES:
+        for load in (0.3, 0.5, 0.7, 0.9):
+            m = hash_map_oa.HashMap(capacity, hash_function_crc32, probing=probing, max_load_factor=0.95)
+            keys = _keys(int(load * m.get_capacity()))
+            for key in keys:
+                m.put(key, key)
+            hits = keys[:lookups]
+            hit_lengths = [_oa_probe_length(m, key) for key in hits]
+            miss_lengths = [_oa_probe_length(m, key) for key in missing]
+
+            start = time.perf_counter()
+            for key in hits:
+                m.get(key)
+            hit_time = time.perf_counter() - start
+            start = time.perf_counter()
+            for key in missing:
+                m.get(key)
+            miss_time = time.perf_counter() - start
+
+            print(f"{probing:>15} {m.table_load():>5.2f} {sum(hit_lengths) / len(hits):>8.2f} "
+                  f"{max(hit_lengths):>8} {sum(miss_lengths) / len(missing):>9.2f} {max(miss_lengths):>9} "
+                  f"{len(hits) / hit_time:>10.0f} {len(missing) / miss_time:>11.0f}")
+
+
+def bench_bulk(n: int = 200000) -> None:
+    """
+    put_many/get_many/remove_many against the equivalent loops of put/get/remove, for both maps started at
+    their default capacity (so the put loop grows through every doubling while put_many resizes once).
+    """
+    pairs = [(key, key) for key in _keys(n)]
+    keys = [key for key, _ in pairs]
+    print(f"{'map':>4} {'operation':>10} {'loop ms':>8} {'bulk ms':>8} {'speedup':>8}")
+    for name, module in (('SC', hash_map_sc), ('OA', hash_map_oa)):
+        loop_map = module.HashMap(11, hash_function_crc32)
+        bulk_map = module.HashMap(11, hash_function_crc32)
+        for operation, loop, bulk in (
+                ('put', lambda: [loop_map.put(key, value) for key, value in pairs],
+                 lambda: bulk_map.put_many(pairs)),
+                ('get', lambda: [loop_map.get(key) for key in keys],
+                 lambda: bulk_map.get_many(keys)),
+                ('remove', lambda: [loop_map.remove(key) for key in keys],
+                 lambda: bulk_map.remove_many(keys))):
+            start = time.perf_counter()
+            loop()
+            loop_time = time.perf_counter() - start
+            start = time.perf_counter()
+            bulk()
+            bulk_time = time.perf_counter() - start
+            print(f"{name:>4} {operation:>10} {loop_time * 1e3:>8.0f} {bulk_time * 1e3:>8.0f} "
+                  f"{loop_time / bulk_time:>7.2f}x")
+
+
+def bench_vectorized_hashing(n: int = 200000) -> None:
+    """
+    hash_many with NumPy (one vectorized pass over an array of code points, plus the bucket indices) against
+    calling hash_function_1/hash_function_2 key by key, and put_many against a put loop with hash_function_2.
+    """
+    import a6_include
+    if a6_include.np is None:
+        print("NumPy is not installed: hash_many falls back to the scalar hash functions")
+        return
+    keys = _keys(n)
+    capacity = next_prime(2 * n)
+    print(f"{'function':>16} {'scalar ms':>10} {'numpy ms':>9} {'speedup':>8}")
+    for function in (hash_function_1, hash_function_2):
+        start = time.perf_counter()
+        scalar = [function(key) % capacity for key in keys]
+        scalar_time = time.perf_counter() - start
+        start = time.perf_counter()
+        vectorized = indices_many(hash_many(function, keys), capacity)
+        numpy_time = time.perf_counter() - start
+        assert scalar == vectorized
+        print(f"{function.__name__:>16} {scalar_time * 1e3:>10.0f} {numpy_time * 1e3:>9.0f} "
+              f"{scalar_time / numpy_time:>7.2f}x")
+
+    # hash_function_1 collides too much on these keys for the map timings to measure anything but chain walks
+    print()
+    print(f"{'map':>4} {'put loop ms':>12} {'put_many ms':>12} {'speedup':>8}")
+    pairs = [(key, key) for key in keys[:n // 10]]
+    for name, module in (('SC', hash_map_sc), ('OA', hash_map_oa)):
+        loop_map = module.HashMap(capacity, hash_function_2)
+        bulk_map = module.HashMap(capacity, hash_function_2)
+        start = time.perf_counter()
+        for key, value in pairs:
+            loop_map.put(key, value)
+        loop_time = time.perf_counter() - start
+        start = time.perf_counter()
+        bulk_map.put_many(pairs)
+        bulk_time = time.perf_counter() - start
+        print(f"{name:>4} {loop_time * 1e3:>12.0f} {bulk_time * 1e3:>12.0f} {loop_time / bulk_time:>7.2f}x")
+
+
+def bench_reserve(n: int = 200000) -> None:
+    """
+    Building a map of n keys from the default capacity against one presized with expected_size (and with reserve),
+    reporting how many times each table was resized along the way.
+    """
+    pairs = [(key, key) for key in _keys(n)]
+    print(f"{'map':>4} {'presizing':>14} {'resizes':>8} {'ms':>8}")
+    for name, module in (('SC', hash_map_sc), ('OA', hash_map_oa)):
+        for presizing in ('none', 'expected_size', 'reserve'):
+            start = time.perf_counter()
+            if presizing == 'expected_size':
+                m = module.HashMap(11, hash_function_crc32, expected_size=n)
+            else:
+                m = module.HashMap(11, hash_function_crc32)
+                if presizing == 'reserve':
+                    m.reserve(n)
+            for key, value in pairs:
+                m.put(key, value)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>4} {presizing:>14} {m.get_resize_count():>8} {elapsed * 1e3:>8.0f}")
+
+
+def bench_incremental_resize(n: int = 500000) -> None:
+    """
+    Per-put latency while building a map of n keys from the default capacity, with and without
+    incremental_resize: the slowest put, the 99.99th percentile and the total time. The garbage collector is
+    paused while timing, so its own pauses do not hide the resizes.
+    """
+    pairs = [(key, key) for key in _keys(n)]
+    print(f"{'map':>4} {'incremental':>12} {'max put ms':>11} {'p99.99 us':>10} {'total ms':>9}")
+    for name, module in (('SC', hash_map_sc), ('OA', hash_map_oa)):
+        for incremental in (False, True):
+            m = module.HashMap(11, hash_function_crc32, incremental_resize=incremental)
+            clock = time.perf_counter
+            latencies = []
+            gc.disable()
+            for key, value in pairs:
+                start = clock()
+                m.put(key, value)
+                latencies.append(clock() - start)
+            gc.enable()
+            latencies.sort()
+            print(f"{name:>4} {str(incremental):>12} {latencies[-1] * 1e3:>11.1f} "
+                  f"{latencies[int(n * 0.9999)] * 1e6:>10.1f} {sum(latencies) * 1e3:>9.0f}")
+
+
+def bench_iteration_memory(n: int = 200000) -> None:
+    """
+    Peak extra memory (tracemalloc) and time of one full scan of a map of n entries: get_keys_and_values, which
+    materializes every pair, against the lazy items()/keys() generators and iterating the map itself.
+    """
+    print(f"{'map':>4} {'scan':>20} {'peak bytes':>11} {'ms':>6}")
+    for name, module in (('SC', hash_map_sc), ('OA', hash_map_oa)):
+        m = module.HashMap(2 * n, hash_function_crc32)
+        for key in _keys(n):
+            m.put(key, key)
+
+        def scan_pairs():
+            pairs = m.get_keys_and_values()
+            for i in range(pairs.length()):
+                pairs[i]
+
+        def scan(iterator):
+            for _ in iterator:
+                pass
+
+        for label, run in (('get_keys_and_values', scan_pairs),
+                           ('items()', lambda: scan(m.items())),
+                           ('keys()', lambda: scan(m.keys())),
+                           ('iter(map)', lambda: scan(m))):
+            tracemalloc.start()
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:>4} {label:>20} {peak:>11} {elapsed * 1e3:>6.0f}")
+
+
+class _CheckedArray(DynamicArray):
+    """DynamicArray whose unchecked() is the array itself, so the maps go back to bounds-checked [] access."""
+
+    def unchecked(self):
+        return self
+
+
+def bench_unchecked_access(n: int = 100000) -> None:
+    """
+    Probe-heavy lookups (half hits, half misses, and updates of existing keys) with the maps' unchecked access to
+    the bucket list against the bounds-checked DynamicArray [] access they used before. Function calls per
+    operation come from cProfile; ops/s is timed without the profiler.
+    """
+    keys = _keys(n)
+    misses = _keys(n, 'miss')
+    print(f"{'map':>20} {'access':>10} {'calls/op':>9} {'ops/s':>9}")
+    for name, make in (
+            ('SC load 4', lambda: hash_map_sc.HashMap(n // 4, hash_function_crc32, 8.0)),
+            ('OA linear .75', lambda: hash_map_oa.HashMap(int(n / .75), hash_function_crc32,
+                                                          probing='linear', max_load_factor=.8)),
+            ('OA quadratic .5', lambda: hash_map_oa.HashMap(2 * n, hash_function_crc32)),
+            ('OA robin_hood .75', lambda: hash_map_oa.HashMap(int(n / .75), hash_function_crc32,
+                                                              probing='robin_hood', max_load_factor=.8))):
+        for access in ('checked', 'unchecked'):
+            m = make()
+            for key in keys:
+                m.put(key, key)
+            if access == 'checked':
+                m._buckets.__class__ = _CheckedArray
+
+            def run():
+                for key, miss in zip(keys, misses):
+                    m.get(key)
+                    m.get(miss)
+                    m.put(key, miss)
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            run()
+            profiler.disable()
+            calls = pstats.Stats(profiler).total_calls / (3 * n)
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            print(f"{name:>20} {access:>10} {calls:>9.1f} {3 * n / elapsed:>9.0f}")
+
+
+class _GlobalLockSCMap(hash_map_sc.HashMap):
+    """SC map with every operation behind one lock: the simplest thread-safe map, to compare lock striping against."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def put(self, key: str, value: object) -> None:
+        with self._lock:
+            super().put(key, value)
+
+    def get(self, key: str):
+        with self._lock:
+            return super().get(key)
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            super().remove(key)
+
+
+def bench_concurrent(n: int = 200000) -> None:
+    """
+    Total throughput of a ThreadPoolExecutor running a read-mostly mix (80% get, 15% put, 5% remove) on one shared
+    map, for 1 to 8 threads: ConcurrentHashMap (striped locks, lock-free reads) against an SC map behind one lock.
+    Under the GIL threads do not run Python code in parallel, so this measures locking overhead and contention.
+    """
+    keys = _keys(n // 4)
+    print(f"{'map':>18} {'threads':>8} {'ops/s':>9}")
+    for name, make in (('global lock', lambda: _GlobalLockSCMap(11, hash_function_crc32)),
+                       ('ConcurrentHashMap', lambda: concurrent_hash_map.ConcurrentHashMap(11, hash_function_crc32))):
+        for threads in (1, 2, 4, 8):
+            m = make()
+            for key in keys:
+                m.put(key, key)
+            per_thread = n // threads
+
+            def worker(seed: int) -> None:
+                rnd = random.Random(seed)
+                for _ in range(per_thread):
+                    key = keys[rnd.randrange(len(keys))]
+                    op = rnd.random()
+                    if op < 0.8:
+                        m.get(key)
+                    elif op < 0.95:
+                        m.put(key, op)
+                    else:
+                        m.remove(key)
+
+            with ThreadPoolExecutor(threads) as pool:
+                start = time.perf_counter()
+                list(pool.map(worker, range(threads)))
+                elapsed = time.perf_counter() - start
+            print(f"{name:>18} {threads:>8} {per_thread * threads / elapsed:>9.0f}")
+
+
+def bench_sharded(n: int = 400000, batch: int = 20000) -> None:
+    """
+    Aggregate throughput of ShardedHashMap with 1 to 8 worker processes: batches of put_many followed by get_many of
+    the same keys. Every batch is split across the shards, which run in parallel, so throughput scales with the worker
+    count up to the number of cores (os.cpu_count() is printed; on a single core only the IPC overhead shows).
+    """
+    keys = _keys(n)
+    batches = [keys[i:i + batch] for i in range(0, n, batch)]
+    print(f"cores: {os.cpu_count()}")
+    print(f"{'workers':>8} {'put ops/s':>10} {'get ops/s':>10}")
+    for workers in (1, 2, 4, 8):
+        with sharded_hash_map.ShardedHashMap(workers, 'sc', 11, hash_function_crc32, expected_size=n // workers) as m:
+            start = time.perf_counter()
+            for part in batches:
+                m.put_many(zip(part, part))
+            put_time = time.perf_counter() - start
+            start = time.perf_counter()
+            for part in batches:
+                m.get_many(part)
+            get_time = time.perf_counter() - start
+        print(f"{workers:>8} {n / put_time:>10.0f} {n / get_time:>10.0f}")
+
+
+def _own_copy_reader(n: int, name: str) -> (int, float):
+    """Build a private open addressing map of _keys(n) and look every key up; return (private KB gained, lookups/s)"""
+    before = shared_hash_map._private_memory_kb()
+    keys = _keys(n)
+    m = hash_map_oa.HashMap(11, hash_function_crc32, expected_size=n)
+    m.put_many(zip(keys, range(n)))
+    start = time.perf_counter()
+    for key in keys:
+        m.get(key)
+    elapsed = time.perf_counter() - start
+    return shared_hash_map._private_memory_kb() - before, n / elapsed
+
+
+def _shared_reader(n: int, name: str) -> (int, float):
+    """Attach to the shared map of _keys(n) and look every key up; return (private KB gained, lookups/s)"""
+    before = shared_hash_map._private_memory_kb()
+    keys = _keys(n)
+    with shared_hash_map.SharedHashMap.attach(name, hash_function_crc32) as m:
+        start = time.perf_counter()
+        for key in keys:
+            m.get(key)
+        elapsed = time.perf_counter() - start
+    return shared_hash_map._private_memory_kb() - before, n / elapsed
+
+
+def bench_shared_memory(n: int = 200000, readers: int = 4) -> None:
+    """
+    Private memory each of several reader processes gains (RssAnon, so pages of the shared block do not count) and
+    its lookup rate, when every reader builds its own hash_map_oa.HashMap of n keys against when all of them attach
+    to one SharedHashMap. Both include the key list every reader builds to look up.
+    """
+    if shared_hash_map._private_memory_kb() is None:
+        print("needs /proc/self/status (Linux)")
+        return
+    keys = _keys(n)
+    with shared_hash_map.SharedHashMap(11, hash_function_crc32, expected_size=n) as shared:
+        shared.put_many(zip(keys, range(n)))
+        print(f"shared block: {shared._block.size // 1024} KB")
+        print(f"{'readers use':>12} {'KB per reader':>14} {'lookups/s':>10}")
+        for label, reader in (('own copy', _own_copy_reader), ('shared map', _shared_reader)):
+            with multiprocessing.Pool(readers) as pool:
+                results = pool.starmap(reader, [(n, shared.name)] * readers)
+            memory = sum(result[0] for result in results) / readers
+            rate = sum(result[1] for result in results) / readers
+            print(f"{label:>12} {memory:>14.0f} {rate:>10.0f}")
+
+
+async def _loop_lag(work) -> (float, float):
+    """
+    Run a coroutine next to a ticker that asks to wake up every millisecond, and return (the worst lateness of the
+    ticker in ms, the coroutine's wall time in ms)
+    """
+    worst = 0.0
+    done = False
+
+    async def ticker() -> None:
+        nonlocal worst
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            worst = max(worst, time.perf_counter() - start - 0.001)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)  # let the ticker start
+    start = time.perf_counter()
+    # keep the result until the ticker is done: freeing a big one is a stall of its own
+    result = await work
+    elapsed = time.perf_counter() - start
+    done = True
+    await task
+    del result
+    return worst * 1000, elapsed * 1000
+
+
+def bench_event_loop_lag(n: int = 1000000) -> None:
+    """
+    Worst event-loop stall while a map of n entries is rebuilt at twice its capacity and while all of its pairs are
+    collected, when a coroutine calls the plain HashMap methods against when it awaits AsyncHashMap's chunked ones.
+    """
+    keys = _keys(n)
+
+    async def blocking(call):
+        return call()
+
+    print(f"{'map':>4} {'operation':>20} {'AsyncHashMap':>13} {'worst stall ms':>15} {'total ms':>9}")
+    for map_type in ('sc', 'oa'):
+        plain = async_hash_map.MAP_TYPES[map_type].HashMap(11, hash_function_crc32, expected_size=n)
+        wrapped = async_hash_map.AsyncHashMap(map_type, 11, hash_function_crc32, expected_size=n)
+        for m in (plain, wrapped._map):
+            m.put_many(zip(keys, range(n)))
+        gc.collect()
+        gc.disable()
+        try:
+            for operation, sync_work, async_work in (
+                    ('resize_table', lambda: blocking(lambda: plain.resize_table(2 * plain.get_capacity())),
+                     lambda: wrapped.resize_table(2 * wrapped.get_capacity())),
+                    ('get_keys_and_values', lambda: blocking(plain.get_keys_and_values),
+                     wrapped.get_keys_and_values)):
+                for is_async, work in ((False, sync_work), (True, async_work)):
+                    stall, total = asyncio.run(_loop_lag(work()))
+                    print(f"{map_type.upper():>4} {operation:>20} {is_async!s:>13} {stall:>15.1f} {total:>9.0f}")
+        finally:
+            gc.enable()
+
+
+def bench_snapshot(n: int = 200000, lookups: int = 20000) -> None:
+    """
+    Startup time for a map of n records: rebuilding it with one put per record, against opening a saved snapshot
+    with open_snapshot (memory-mapped, read-only) and rebuilding a mutable map with load_snapshot. The time to save the
+    snapshot, its size and the lookup rate of the rebuilt and the mapped maps are reported too.
+    """
+    records = [(key, i) for i, key in enumerate(_keys(n))]
+    probe = [records[random.randrange(n)][0] for _ in range(lookups)]
+    path = os.path.join(tempfile.mkdtemp(), 'bench.snapshot')
+    print(f"{'map':>4} {'startup':>14} {'ms':>9} {'lookups/s':>10}")
+    for map_type, module in (('SC', hash_map_sc), ('OA', hash_map_oa)):
+        start = time.perf_counter()
+        m = module.HashMap(11, hash_function_crc32)
+        for key, value in records:
+            m.put(key, value)
+        put_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for key in probe:
+            m.get(key)
+        put_rate = lookups / (time.perf_counter() - start)
+        print(f"{map_type:>4} {'put per record':>14} {put_ms:>9.1f} {put_rate:>10.0f}")
+
+        start = time.perf_counter()
+        snapshot.save_snapshot(m, path)
+        save_ms = (time.perf_counter() - start) * 1000
+        print(f"{map_type:>4} {'(save)':>14} {save_ms:>9.1f} {'':>10} {os.path.getsize(path) // 1024} KB")
+
+        start = time.perf_counter()
+        mapped = snapshot.open_snapshot(path)
+        mapped.get(probe[0])
+        open_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for key in probe:
+            mapped.get(key)
+        mapped_rate = lookups / (time.perf_counter() - start)
+        mapped.close()
+        print(f"{map_type:>4} {'open_snapshot':>14} {open_ms:>9.1f} {mapped_rate:>10.0f}")
+
+        start = time.perf_counter()
+        snapshot.load_snapshot(path)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"{map_type:>4} {'load_snapshot':>14} {load_ms:>9.1f}")
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+
+def _peak_rss_kb() -> int:
+    """Return the peak resident memory of this process in KB (VmHWM), or 0 where /proc is unavailable"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _load_rows(path: str, streaming: bool) -> (float, int):
+    """
+    Build an SC map of the CSV file at path, either streaming it or reading every row into a list and calling put
+    per row, and return (rows/s, peak RSS in KB)
+    """
+    start = time.perf_counter()
+    m = hash_map_sc.HashMap(11, hash_function_crc32)
+    if streaming:
+        rows = stream_loader.load_file(m, path)
+    else:
+        with open(path, newline='') as file:
+            table = list(csv.reader(file))
+        for key, value in table:
+            m.put(key, value)
+        rows = len(table)
+    return rows / (time.perf_counter() - start), _peak_rss_kb()
+
+
+def bench_streaming_load(n: int = 500000) -> None:
+    """
+    Rows/s and peak RSS of building an SC map from an n-row CSV file by streaming it through stream_loader (batches of
+    put_many) against reading all rows into a list first and calling put per row. Every load runs in a freshly
+    spawned process, so the peaks are not inflated by earlier work; a bare process's peak is shown for reference.
+    """
+    path = os.path.join(tempfile.mkdtemp(), 'bench.csv')
+    with open(path, 'w', newline='') as file:
+        csv.writer(file).writerows((key, 'value-' + key) for key in _keys(n))
+    print(f"file: {os.path.getsize(path) // 1024} KB, {n} rows")
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        print(f"bare process peak RSS: {pool.apply(_peak_rss_kb)} KB")
+    print(f"{'load':>22} {'rows/s':>9} {'peak RSS KB':>12}")
+    for label, streaming in (('list + put per row', False), ('stream_loader', True)):
+        # a new process per load: peak RSS never goes down
+        with context.Pool(1) as pool:
+            rate, peak = pool.apply(_load_rows, (path, streaming))
+        print(f"{label:>22} {rate:>9.0f} {peak:>12}")
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+
+def bench_stats(n: int = 200000, repeats: int = 3) -> None:
+    """
+    The cost of stats=True: n puts then n gets with the counters off and on (best of repeats), and reading
+    get_stats against an empty_buckets scan of the final table.
+    """
+    pairs = [(key, key) for key in _keys(n)]
+    keys = [key for key, _ in pairs]
+    print(f"{'map':>4} {'stats':>6} {'put ms':>8} {'get ms':>8} {'read us':>8} {'scan us':>8}")
+    for name, module in (('SC', hash_map_sc), ('OA', hash_map_oa)):
+        for stats in (False, True):
+            put_times, get_times = [], []
+            for _ in range(repeats):
+                m = module.HashMap(11, hash_function_crc32, stats=stats)
+                start = time.perf_counter()
+                for key, value in pairs:
+                    m.put(key, value)
+                put_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                for key in keys:
+                    m.get(key)
+                get_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            if stats:
+                summary = m.get_stats()
+            read = time.perf_counter() - start
+            start = time.perf_counter()
+            m.empty_buckets()
+            scan = time.perf_counter() - start
+            print(f"{name:>4} {str(stats):>6} {min(put_times) * 1e3:>8.0f} {min(get_times) * 1e3:>8.0f} "
+                  f"{read * 1e6 if stats else 0:>8.1f} {scan * 1e6:>8.0f}")
+        print(' ' * 5, {key: value for key, value in summary.items()
+                        if key not in ('chain_lengths', 'probe_lengths')})
+
+
+def bench_empty_buckets(n: int = 1000000) -> None:
+    """
+    empty_buckets on a table of n keys, now read from counters kept by every change, against the full scan of
+    the table it used to make.
+    """
+    pairs = [(key, key) for key in _keys(n)]
+    print(f"{'map':>4} {'capacity':>9} {'scan ms':>8} {'counter us':>11}")
+    for name, module in (('SC', hash_map_sc), ('OA', hash_map_oa)):
+        m = module.HashMap(11, hash_function_crc32, expected_size=n)
+        m.put_many(pairs)
+        buckets = m._buckets.unchecked()
+        start = time.perf_counter()
+        if module is hash_map_sc:
+            scanned = sum(1 for bucket in buckets if bucket.length() == 0)
+        else:
+            scanned = sum(1 for entry in buckets if entry is None or entry.is_tombstone)
+        scan = time.perf_counter() - start
+        start = time.perf_counter()
+        counted = m.empty_buckets()
+        counter = time.perf_counter() - start
+        assert counted == scanned
+        print(f"{name:>4} {m.get_capacity():>9} {scan * 1e3:>8.0f} {counter * 1e6:>11.1f}")
+
+
+def _find_mode_per_put(da: DynamicArray) -> (DynamicArray, int):
+    """find_mode as it was before the counting engine: several hashes and chain walks per element"""
+    map = hash_map_sc.HashMap()
+    return_arr = DynamicArray()
+    max_frequency = 1
+    for i in range(da.length()):
+        hash = map.get_function()(da[i])
+        index = hash % map.get_capacity()
+        if map.contains_key(da[i]):
+            value = map.get_buckets()[index].contains(da[i]).value
+            if value is not None:
+                count = value + 1
+                if count >= max_frequency:
+                    max_frequency = count
+                map.put(da[i], count)
+        else:
+            map.put(da[i], 1)
+    for i in range(map.get_capacity()):
+        for node in map.get_buckets()[i]:
+            if node.value == max_frequency:
+                return_arr.append(node.key)
+    return return_arr, max_frequency
+
+
+def _find_mode_without_numpy(da: DynamicArray) -> (DynamicArray, int):
+    """find_mode as it runs when NumPy is not installed"""
+    np, hash_map_sc.np = hash_map_sc.np, None
+    try:
+        return hash_map_sc.find_mode(da)
+    finally:
+        hash_map_sc.np = np
+
+
+def bench_find_mode(n: int = 1000000, before_n: int = 20000) -> None:
+    """
+    find_mode throughput (elements/s) on n strings and n ints drawn from n / 10 distinct values, against the
+    per-element put/contains_key version it replaced (on before_n elements), after checking on random arrays that
+    both return the same modes (in any order) and frequency.
+    """
+    rnd = random.Random(0)
+    mismatches = 0
+    for _ in range(100):
+        distinct = rnd.choice([2, 30, 1000])
+        da = DynamicArray([str(rnd.randrange(distinct)) for _ in range(rnd.randrange(1, 3000))])
+        mode, frequency = hash_map_sc.find_mode(da)
+        before, before_frequency = _find_mode_per_put(da)
+        mismatches += (sorted(mode.unchecked()) != sorted(before.unchecked()) or frequency != before_frequency)
+    print("equivalence mismatches over 100 random arrays:", mismatches)
+
+    strings = [str(rnd.randrange(n // 10)) for _ in range(n)]
+    ints = [rnd.randrange(n // 10) for _ in range(n)]
+    runs = (('before (str)', _find_mode_per_put, strings[:before_n]),
+            ('str', hash_map_sc.find_mode, strings),
+            ('int, HashMap', _find_mode_without_numpy, ints),
+            ('int, NumPy', hash_map_sc.find_mode, ints))
+    print(f"{'input':>14} {'elements':>9} {'seconds':>8} {'elements/s':>11}")
+    for name, function, values in runs:
+        if name == 'int, NumPy' and hash_map_sc.np is None:
+            continue
+        da = DynamicArray(values)
+        start = time.perf_counter()
+        function(da)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>14} {len(values):>9} {elapsed:>8.2f} {len(values) / elapsed:>11,.0f}")
+
+
+BENCHMARKS = {
+    'sc_growth': bench_sc_growth,
+    'sc_resize': bench_sc_resize,
+    'cached_hash_resize': bench_cached_hash_resize,
+    'entry_memory': bench_entry_memory,
+    'hash_functions': bench_hash_functions,
+    'power_of_two': bench_power_of_two,
+    'next_prime': bench_next_prime,
+    'oa_churn': bench_oa_churn,
+    'oa_single_probe': bench_oa_single_probe,
+    'oa_probing': bench_oa_probing,
+    'bulk': bench_bulk,
+    'vectorized_hashing': bench_vectorized_hashing,
+    'reserve': bench_reserve,
+    'incremental_resize': bench_incremental_resize,
+    'iteration_memory': bench_iteration_memory,
+    'unchecked_access': bench_unchecked_access,
+    'concurrent': bench_concurrent,
+    'sharded': bench_sharded,
+    'shared_memory': bench_shared_memory,
+    'event_loop_lag': bench_event_loop_lag,
+    'snapshot': bench_snapshot,
+    'streaming_load': bench_streaming_load,
+    'stats': bench_stats,
+    'empty_buckets': bench_empty_buckets,
+    'find_mode': bench_find_mode,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"\n{name}")
+        print('-' * len(name))
+        BENCHMARKS[name]()
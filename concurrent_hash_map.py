@@ -0,0 +1,325 @@
+# Course: CS261 - Data Structures
+# Assignment: Assignment 6: HashMap Implementation
+# Description: A thread-safe variant of the separate chaining hash map (hash_map_sc.py) for maps shared between threads.
+# Writers lock only the stripe (a contiguous range of buckets) their key falls in, resizes take a global lock plus every
+# stripe lock, and reads take no lock at all unless they overlap a resize.
+
+
+import threading
+
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_1
+
+
+class ConcurrentHashMap(hash_map_sc.HashMap):
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 max_load_factor: float = 1.0,
+                 min_load_factor: float = 0.0,
+                 power_of_two: bool = False,
+                 expected_size: int = 0,
+                 stripes: int = 16) -> None:
+        """
+        Initialize new thread-safe HashMap that uses separate chaining for
+        collision resolution (see hash_map_sc.HashMap for the arguments).
+        The buckets are split into stripes contiguous ranges, each guarded by
+        its own lock, so writers to different stripes do not wait for each
+        other. Resizing takes a global lock and then every stripe lock.
+        get and contains_key take no lock: they validate their walk against
+        a version number that resizes bump, and only fall back to the stripe
+        lock if a resize overlapped them.
+        """
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        self._stripes = stripes
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        # serializes resizes; reentrant because a growing put calls resize_table
+        self._resize_lock = threading.RLock()
+        # odd while a resize (or clear) is replacing the table
+        self._version = 0
+        # entries added minus entries removed under each stripe lock; only
+        # their sum (the size) is meaningful once the table has been resized
+        self._stripe_sizes = [0] * stripes
+        # buckets emptied minus buckets filled under each stripe lock since
+        # the last resize (or clear), which recounts _empty_count
+        self._stripe_empty = [0] * stripes
+        super().__init__(capacity, function, max_load_factor, min_load_factor,
+                         power_of_two, expected_size)
+
+    def _stripe(self, index: int) -> int:
+        """Return the stripe of a bucket index"""
+        # an index read without holding a lock may come from a torn
+        # capacity, so clamp it
+        return min(index * self._stripes // self._capacity, self._stripes - 1)
+
+    def _lock_bucket(self, hash: int) -> (threading.Lock, int, int):
+        """
+        Acquire the lock of the stripe holding the bucket for a hash and
+        return (lock, bucket index, stripe). The index cannot change until
+        the lock is released, since resizes hold every stripe lock.
+        """
+        while True:
+            stripe = self._stripe(self._bucket_index(hash))
+            lock = self._locks[stripe]
+            lock.acquire()
+            index = self._bucket_index(hash)
+            if self._stripe(index) == stripe:
+                return lock, index, stripe
+            # the table was resized before the lock was acquired
+            lock.release()
+
+    def _lock_all(self) -> None:
+        """Acquire the resize lock and then every stripe lock, in order"""
+        self._resize_lock.acquire()
+        for lock in self._locks:
+            lock.acquire()
+
+    def _unlock_all(self) -> None:
+        """Release every lock taken by _lock_all"""
+        for lock in reversed(self._locks):
+            lock.release()
+        self._resize_lock.release()
+
+    def _resize_from(self, capacity: int, new_capacity: int) -> None:
+        """
+        Resize the table to new_capacity, unless another thread has already
+        resized it away from capacity (the one the caller saw)
+        """
+        with self._resize_lock:
+            if self._capacity == capacity:
+                self.resize_table(new_capacity)
+
+    def _find_node(self, key: str, hash: int):
+        """
+        Return the node of key (or None) without taking a lock if no resize
+        overlaps the walk; otherwise walk again under the stripe lock
+        """
+        version = self._version
+        if not version & 1:
+            try:
+                node = self._buckets.unchecked()[self._bucket_index(hash)].contains(key, hash)
+            except IndexError:
+                # the capacity and the bucket list came from different tables
+                pass
+            else:
+                if self._version == version:
+                    return node
+        lock, index, _ = self._lock_bucket(hash)
+        try:
+            return self._buckets.unchecked()[index].contains(key, hash)
+        finally:
+            lock.release()
+
+    # ------------------------------------------------------------------ #
+
+    def get_size(self) -> int:
+        """Return size of map"""
+        return sum(self._stripe_sizes)
+
+    def table_load(self, include_tombstones: bool = False) -> float:
+        """
+        This method (named table_load) returns the current hash table load factor (separate chaining leaves no tombstones).
+        """
+        return self.get_size() / self._capacity
+
+    def put(self, key: str, value: object) -> None:
+        """
+        This method (named put) updates the key/value pair in the hash map, locking only the stripe of its bucket.
+        The table is doubled first if the load factor has reached max_load_factor.
+        """
+        hash = self._hash_function(key)
+        capacity = self._capacity
+        if self.get_size() / capacity >= self._max_load_factor:
+            self._resize_from(capacity, 2 * capacity)
+
+        lock, index, stripe = self._lock_bucket(hash)
+        try:
+            bucket = self._buckets.unchecked()[index]
+            node = bucket.contains(key, hash)
+            if node is not None:
+                node.value = value
+            else:
+                # a single store of the bucket head: lock-free readers see
+                # the chain either with or without the new node
+                bucket.insert(key, value, hash)
+                self._stripe_sizes[stripe] += 1
+                if bucket.length() == 1:
+                    self._stripe_empty[stripe] -= 1
+        finally:
+            lock.release()
+
+    def get(self, key: str):
+        """
+        This method (named get) returns the value associated with the given key, or None. It takes no lock unless a resize overlaps it.
+        """
+        node = self._find_node(key, self._hash_function(key))
+        return None if node is None else node.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        This method (named contains_key) returns True if the given key exists in the hash map, and False otherwise. It takes no lock unless a resize overlaps it.
+        """
+        return self._find_node(key, self._hash_function(key)) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        This method (named remove) removes the key/value pair from the hash map using the given key, locking only the stripe of its bucket.
+        If min_load_factor is set and the load factor drops below it, the table is halved.
+        """
+        hash = self._hash_function(key)
+        lock, index, stripe = self._lock_bucket(hash)
+        try:
+            # unlinking is a single store of the previous node's next, so
+            # lock-free readers never see a broken chain
+            bucket = self._buckets.unchecked()[index]
+            removed = bucket.remove(key, hash)
+            if removed:
+                self._stripe_sizes[stripe] -= 1
+                if bucket.length() == 0:
+                    self._stripe_empty[stripe] += 1
+        finally:
+            lock.release()
+
+        capacity = self._capacity
+        if (removed and capacity > self._min_capacity
+                and self.get_size() / capacity < self._min_load_factor):
+            self._resize_from(capacity, max(capacity // 2, self._min_capacity))
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        This method (named resize_table) changes the capacity of the internal hash table, as hash_map_sc.HashMap.resize_table does, while holding every lock.
+        """
+        self._lock_all()
+        try:
+            self._version += 1
+            super().resize_table(new_capacity)
+            self._stripe_empty = [0] * self._stripes
+        finally:
+            self._version += 1
+            self._unlock_all()
+
+    def clear(self) -> None:
+        """
+        This method (named clear) removes all key/value pairs from the hash map, while holding every lock.
+        """
+        self._lock_all()
+        try:
+            self._version += 1
+            super().clear()
+            self._stripe_sizes = [0] * self._stripes
+            self._stripe_empty = [0] * self._stripes
+        finally:
+            self._version += 1
+            self._unlock_all()
+
+    def empty_buckets(self) -> int:
+        """
+        This method (named empty_buckets) returns the number of empty buckets in the hash table: the count of the last resize plus the changes of every stripe since, read while holding every lock.
+        """
+        self._lock_all()
+        try:
+            return self._empty_count + sum(self._stripe_empty)
+        finally:
+            self._unlock_all()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        This method (named get_keys_and_values) returns a DynamicArray of (key, value) tuples, a consistent snapshot taken while holding every lock.
+        """
+        self._lock_all()
+        try:
+            return super().get_keys_and_values()
+        finally:
+            self._unlock_all()
+
+    def _nodes(self):
+        """
+        Yield (a snapshot of) every node of the table. Other threads may keep
+        changing the map meanwhile: nodes added later are not yielded, nodes
+        removed later still are.
+        """
+        self._lock_all()
+        try:
+            nodes = [node for bucket in self._buckets.unchecked() for node in bucket]
+        finally:
+            self._unlock_all()
+        yield from nodes
+
+    def __iter__(self):
+        """
+        This method (named __iter__) returns an iterator over (a snapshot of) the nodes in the hash map.
+        The map is its own iterator, as in the base class, but __next__ walks the snapshot taken here
+        rather than the live table, so other threads may keep changing the map meanwhile.
+        """
+        self._iter_nodes = iter(list(self._nodes()))
+        return self
+
+    def __next__(self):
+        """
+        This method (named __next__) returns the next node of the snapshot taken by the last __iter__.
+        """
+        return next(self._iter_nodes)
+
+    def put_many(self, pairs) -> None:
+        """Put every (key, value) pair of an iterable, one put at a time"""
+        for key, value in pairs:
+            self.put(key, value)
+
+    def get_many(self, keys) -> list:
+        """Return a list with the value of every key of an iterable, in order (None for missing keys)"""
+        return [self.get(key) for key in keys]
+
+    def remove_many(self, keys) -> None:
+        """Remove every key of an iterable, one remove at a time"""
+        for key in keys:
+            self.remove(key)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    print("\nConcurrent - put/get/remove example 1")
+    print("-------------------------------------")
+    m = ConcurrentHashMap(53, hash_function_1, stripes=4)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+    m.remove('str0')
+    print(m.get('str0'), m.get('str1'), m.contains_key('str1'), m.get_size())
+
+    print("\nConcurrent - stress test (threads on shared and private keys)")
+    print("--------------------------------------------------------------")
+    # every thread writes its own keys and fights over a shared set; the
+    # final map must hold exactly the private keys that were not removed
+    threads, per_thread = 8, 4000
+    m = ConcurrentHashMap(11, hash_function_1, stripes=8)
+
+    def worker(t: int) -> int:
+        misses = 0
+        for i in range(per_thread):
+            key = f'{t}-{i}'
+            m.put(key, i)
+            m.put('shared' + str(i % 64), t)
+            if m.get(key) != i:
+                misses += 1
+            if i % 3 == 0:
+                m.remove(key)
+                if m.contains_key(key):
+                    misses += 1
+        return misses
+
+    with ThreadPoolExecutor(threads) as pool:
+        misses = sum(pool.map(worker, range(threads)))
+    expected = {f'{t}-{i}': i for t in range(threads) for i in range(per_thread) if i % 3}
+    pairs = m.get_keys_and_values()
+    found = {pairs[i][0]: pairs[i][1] for i in range(pairs.length())}
+    shared = {key: found.pop(key) for key in list(found) if key.startswith('shared')}
+    print("lost reads:", misses)
+    print("private keys correct:", found == expected)
+    print("shared keys:", len(shared), all(0 <= v < threads for v in shared.values()))
+    print("size matches:", m.get_size() == len(expected) + len(shared))
+    print("resizes:", m.get_resize_count())
@@ -9,26 +9,97 @@
 # linked lists (included in their respective classes) provided in a6_include.py.
 
 
-from a6_include import (DynamicArray, DynamicArrayException, HashEntry,
-                        hash_function_1, hash_function_2)
+import copy
+
+from a6_include import (DynamicArray, DynamicArrayException, HashEntry, HashMapStats,
+                        hash_function_1, hash_function_2, hash_many, indices_many,
+                        next_prime)
+
+
+# collision resolution strategies accepted by HashMap(probing=...)
+PROBING_STRATEGIES = ('linear', 'quadratic', 'double_hashing', 'robin_hood')
+
+# left in the old table of an incremental resize in place of every entry that
+# has been moved out (or removed): a tombstone, so probe sequences go past it
+_MOVED = HashEntry(None, None, 0)
+_MOVED.is_tombstone = True
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self, capacity: int, function,
+                 power_of_two: bool = False,
+                 probing: str = 'quadratic',
+                 max_load_factor: float = 0.5,
+                 expected_size: int = 0,
+                 incremental_resize: bool = False,
+                 stats: bool = False) -> None:
         """
         Initialize new HashMap that uses
-        quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
-        """
+        quadratic probing for collision resolution, unless probing selects
+        one of the other PROBING_STRATEGIES:
+        'linear' probes consecutive slots, 'double_hashing' steps by a second
+        hash-derived stride and 'robin_hood' is linear probing that keeps
+        entries ordered by their distance from home, deleting by shifting
+        later entries back instead of leaving tombstones.
+        With power_of_two the capacity is a power of two instead of a prime,
+        the home slot is taken from the top bits of the hash times a 64-bit
+        golden ratio constant (Fibonacci hashing) and the quadratic probe
+        offsets are triangular numbers (which visit every slot of such a
+        table).
+        The table doubles when put is called at a load factor of at least
+        max_load_factor (0.5 by default, where quadratic probing in a prime
+        table is guaranteed to find a free slot).
+        With expected_size the table starts large enough to hold that many
+        entries without resizing (see reserve).
+        With incremental_resize a resize only allocates the new table: the
+        entries of the old one are moved over a few slots at a time by the
+        following put/get/contains_key/remove calls (lookups check both
+        tables meanwhile), so no single call pays for the whole rehash.
+        With stats the map keeps probe-length, resize and hash call counters
+        up to date as it is used, for get_stats to read in constant time.
+        """
+        if probing not in PROBING_STRATEGIES:
+            raise ValueError(f"probing must be one of {PROBING_STRATEGIES}")
+        if not 0 < max_load_factor < 1:
+            raise ValueError("max_load_factor must be between 0 and 1")
+        self._probing = probing
+        self._max_load_factor = max_load_factor
+
         self._buckets = DynamicArray()
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        # capacity must be a prime number (or a power of two)
+        self._power_of_two = power_of_two
+        self._capacity = max(self._table_capacity(capacity),
+                             self._reserve_capacity(expected_size))
+        self._mask = self._capacity - 1
+        self._shift = 64 - self._mask.bit_length()
         for _ in range(self._capacity):
             self._buckets.append(None)
 
+        # probe steps grow by this much each time: 2 turns 1, 3, 5, ... into
+        # the offsets 1, 4, 9, ... (j^2), 1 gives triangular offsets
+        if probing == 'quadratic':
+            self._step_increment = 1 if power_of_two else 2
+        else:
+            self._step_increment = 0
+
         self._hash_function = function
         self._size = 0
+        self._tombstones = 0  # removed entries still occupying a slot
+        self._resize_count = 0  # times the table has been rebuilt
+        # HashMapStats kept up to date if stats is set, else None
+        self._stats = HashMapStats() if stats else None
+
+        self._incremental_resize = incremental_resize
+        self._old_table = None  # map holding the table being migrated from
+        self._migrated = 0  # slots of the old table already migrated
+        self._migrate_step = 0  # old slots migrated per operation
+
+        # bumped by every change other than a value update, so iterators can
+        # tell that the map changed under them
+        self._modifications = 0
+        self._iter_index = 0  # next slot for __next__ to look at
+        self._iter_modifications = 0
 
     def __str__(self) -> str:
         """
@@ -87,6 +158,211 @@ class HashMap:
         """
         return self._capacity
 
+    def _table_capacity(self, capacity: int) -> int:
+        """
+        Return the capacity the table uses for a requested capacity:
+        the next power of two in power-of-two mode, otherwise the next prime.
+        Primes come from the precomputed ladder in a6_include.py where
+        possible (always, when doubling a table that started on it) and from
+        a Miller-Rabin search otherwise, so huge capacities do not stall.
+        """
+        if self._power_of_two:
+            return 1 << max(capacity - 1, 0).bit_length()
+        # a table needs at least 2 buckets; 1 and below were always rounded to 3
+        return next_prime(capacity) if capacity > 1 else 3
+
+    def _reserve_capacity(self, count: int) -> int:
+        """
+        Return the smallest capacity the table uses that holds count entries
+        without put growing it
+        """
+        # the put of the count-th entry grows a table at a load of at least
+        # max_load_factor, i.e. if (count - 1) / capacity >= max_load_factor
+        load_factor = self._max_load_factor
+        if self._probing == 'quadratic' and not self._power_of_two:
+            # above .5 quadratic probing can miss the free slots of a prime
+            # table, which also grows it
+            load_factor = min(load_factor, 0.5)
+        capacity = self._table_capacity(int((count - 1) / load_factor) + 1)
+        while (count - 1) / capacity >= load_factor:
+            capacity = self._table_capacity(capacity + 1)
+        return capacity
+
+    def get_resize_count(self) -> int:
+        """Return the number of times the table has been resized (rehashed)"""
+        return self._resize_count
+
+    def get_stats(self) -> dict:
+        """
+        Return the statistics of a map built with stats=True: the probe-length
+        histogram of every lookup so far ({slots probed: lookups}, counting
+        the walks put, get, contains_key and remove make), the longest probe
+        sequence walked, the number of tombstones, the number of resizes,
+        the total time spent resizing and the number of keys hashed. Reading
+        them costs no scan of the table.
+        """
+        stats = self._stats
+        if stats is None:
+            raise RuntimeError("stats are disabled (build the map with stats=True)")
+        return {'size': self._size,
+                'capacity': self._capacity,
+                'probe_lengths': stats.histogram(),
+                'max_probe': stats.max_length,
+                'tombstones': self._tombstones,
+                'resizes': self._resize_count,
+                'resize_seconds': stats.resize_seconds,
+                'hash_calls': stats.hash_calls}
+
+    def reserve(self, count: int) -> None:
+        """
+        Grow the table, if needed, so that it holds count entries in total
+        without resizing again. A table that is already large enough is
+        left alone (reserve never shrinks it).
+        """
+        capacity = self._reserve_capacity(count)
+        if capacity > self._capacity:
+            self.resize_table(capacity)
+
+    def _bucket_index(self, hash: int) -> int:
+        """Return the home slot for a (cached) hash"""
+        if self._power_of_two:
+            # Fibonacci hashing: multiply by 2^64 / golden ratio and keep the
+            # top bits, so every bit of a weak hash still affects the index
+            return ((hash * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> self._shift
+        return hash % self._capacity
+
+    def _bucket_indices(self, hashes: list) -> list:
+        """Return the home slot of every hash in a list (see _bucket_index)"""
+        return indices_many(hashes, self._capacity,
+                            self._shift if self._power_of_two else None)
+
+    def _first_step(self, hash: int) -> int:
+        """Return the distance between the first two slots of a probe sequence"""
+        if self._probing != 'double_hashing' or self._capacity == 1:
+            return 1
+        # a second hash gives every key its own stride; the stride must be
+        # coprime with the capacity to reach every slot: any stride works for
+        # a prime, an odd one for a power of two
+        if self._power_of_two:
+            return (hash | 1) & self._mask
+        return 1 + (hash // self._capacity) % (self._capacity - 1)
+
+    def _find_slot(self, key: str, hash: int, index: int = None) -> (int, bool):
+        """
+        Walk the probe sequence of key once and return (index, found).
+        If key is stored, index is the slot holding its live entry. If not,
+        index is where it should be inserted instead: the first tombstone on
+        the sequence, else the empty slot that ended it (for Robin Hood, the
+        slot whose entry is closer to home than the key would be), or -1 if
+        every slot the sequence reaches is taken. index is the home slot of
+        hash, if already known.
+        """
+        if index is None:
+            index = self._bucket_index(hash)
+        step = self._first_step(hash)
+        first_tombstone = -1  # first reusable slot on the probe sequence
+        robin_hood = self._probing == 'robin_hood'
+        # every index below is reduced modulo the capacity
+        buckets = self._buckets.unchecked()
+
+        j = 0  # slots probed so far, i.e. distance from home for Robin Hood
+        # after capacity probes the sequence only repeats itself
+        while j < self._capacity:
+            entry = buckets[index]
+            if entry is None:
+                # end of the sequence: the key is not stored
+                if self._stats is not None:
+                    self._stats.count(j + 1)
+                return (index if first_tombstone < 0 else first_tombstone), False
+            if entry.is_tombstone:
+                # remember the first tombstone, but keep probing in case the
+                # key is stored further along the sequence
+                if first_tombstone < 0:
+                    first_tombstone = index
+            # if the key is found (cached hashes are compared before keys)
+            elif entry.hash == hash and entry.key == key:
+                if self._stats is not None:
+                    self._stats.count(j + 1)
+                return index, True
+            elif (robin_hood and (index - self._bucket_index(entry.hash))
+                    % self._capacity < j):
+                # entries are ordered by distance from home, so the key
+                # would have been stored before this closer-to-home entry
+                if self._stats is not None:
+                    self._stats.count(j + 1)
+                return index, False
+            # step to the next slot of the probe sequence
+            index = (index + step) % self._capacity
+            step += self._step_increment
+            j += 1
+        if self._stats is not None:
+            self._stats.count(j)
+        return first_tombstone, False
+
+    def _place_entry(self, index: int, entry: HashEntry) -> None:
+        """
+        Store an entry whose key is not in the table at slot index, found by
+        _find_slot. For Robin Hood the slot may be taken: the entry then
+        displaces the resident, which moves on (displacing others in turn)
+        until an empty slot is reached.
+        """
+        buckets = self._buckets.unchecked()
+        if self._probing != 'robin_hood':
+            buckets[index] = entry
+            return
+
+        distance = (index - self._bucket_index(entry.hash)) % self._capacity
+        while buckets[index] is not None:
+            resident = buckets[index]
+            resident_distance = (index - self._bucket_index(resident.hash)) % self._capacity
+            if resident_distance < distance:
+                # the poorer entry takes the slot; the richer one moves on
+                buckets[index] = entry
+                entry, distance = resident, resident_distance
+            index = (index + 1) % self._capacity
+            distance += 1
+        buckets[index] = entry
+
+    def _migrate(self, count: int) -> None:
+        """
+        Move the entries of the next count slots of the old table into the
+        current one, and drop the old table once all of them are moved
+        """
+        if self._stats is not None:
+            self._stats.resize_started()
+        old_table = self._old_table
+        old_buckets = old_table._buckets.unchecked()
+        end = min(self._migrated + count, old_table._capacity)
+        for i in range(self._migrated, end):
+            entry = old_buckets[i]
+            if entry is not None and entry.is_tombstone is False:
+                while not self._rehash_entry(entry):
+                    # no free slot on its probe sequence: grow the new table
+                    self._rebuild(self._table_capacity(2 * self._capacity))
+                old_buckets[i] = _MOVED
+        self._migrated = end
+        if end == old_table._capacity:
+            self._old_table = None
+        if self._stats is not None:
+            self._stats.resize_finished()
+
+    def _finish_resize(self) -> None:
+        """Complete the incremental resize in progress, if any"""
+        if self._old_table is not None:
+            self._migrate(self._old_table._capacity)
+
+    def _remove_old(self, key: str, hash: int) -> bool:
+        """
+        During an incremental resize, remove a key that has not been migrated
+        yet from the old table. Return True if it was there.
+        """
+        # always a tombstone: shifting entries back could move one into the
+        # part of the table that has already been migrated
+        index, found = self._old_table._find_slot(key, hash)
+        if found:
+            self._old_table._buckets.set_at_index(index, _MOVED)
+        return found
+
     # ------------------------------------------------------------------ #
 
     def put(self, key: str, value: object) -> None:
@@ -94,151 +370,270 @@ class HashMap:
         This method (named put) updates the key/value pair in the hash map. If the given key already exits in the hash map, its associated value must be replaced with the new value. 
         If the given key is not in the hash map, a new key/value pair is added to the hash map. 
         """
-        if self.table_load() >= .5:  # if the table load is greater than or equal to .5
-            # resize the table if the load factor is greater than or equal to .5
+        if self._old_table is not None:
+            self._migrate(self._migrate_step)
+        if self.table_load() >= self._max_load_factor:  # if the table load is greater than or equal to the max (.5)
+            # resize the table if the load factor is greater than or equal to the max
             self.resize_table(2 * self._capacity)  # double the capacity
+        elif (self._size + self._tombstones) / self._capacity >= self._max_load_factor:
+            # tombstones are what fills the table: rehash at the same capacity
+            # to drop them, which keeps probe sequences (and misses) short
+            self.resize_table(self._capacity)
+
+        if self._stats is not None:
+            self._stats.hash_calls += 1
+        self._put_hashed(key, value, self._hash_function(key))
+
+    def _put_hashed(self, key: str, value: object, hash: int, index: int = None) -> None:
+        """
+        Put a key whose hash (and possibly home slot) is already known,
+        without any load check
+        """
+        if self._old_table is not None:
+            # the key may not have been migrated yet
+            old_index, found = self._old_table._find_slot(key, hash)
+            if found:
+                self._old_table._buckets[old_index].value = value
+                return
+
+        # one walk of the probe sequence
+        index, found = self._find_slot(key, hash, index)
+        buckets = self._buckets.unchecked()
+        if found:
+            # update the value if the key is found
+            buckets[index].value = value
+            return
+        if index < 0:
+            # every slot this key can probe is taken (only possible in tiny
+            # tables): grow and try again
+            self.resize_table(2 * self._capacity)
+            self._put_hashed(key, value, hash)
+            return
 
-        # create a new hash entry with the key and value
-        element = HashEntry(key, value)  # create a new hash entry
-        hash = self._hash_function(key)
-        index = hash % self._capacity  # get the index
-        initial_index = index  # save the initial index
-
-        j = 1
-        while self._buckets[index] is not None:  # while the bucket is not None
-            if self._buckets[index].key == key:  # if the key is found
-                # if the bucket is not a tombstone
-                if self._buckets[index].is_tombstone is False:
-                    # update the value if the key is found
-                    self._buckets[index].value = value
-                    return
-                else:
-                    self._buckets.set_at_index(index, element)
-                    self._size += 1
-                    return
-            else:
-                # quadratic probing to find the spot
-                index = (initial_index + j ** 2) % self._capacity
-                j += 1
-
-        if self._buckets[index] is None:  # if the bucket is None
-            # set the element at the index
-            self._buckets.set_at_index(index, element)
-            self._size += 1
+        entry = buckets[index]
+        if entry is not None and entry.is_tombstone:
+            # reuse the tombstone instead of the empty slot further along
+            self._tombstones -= 1
+        # store a new hash entry with the key, value and cached hash
+        self._place_entry(index, HashEntry(key, value, hash))
+        self._size += 1
+        self._modifications += 1
 
-    def table_load(self) -> float:
+    def table_load(self, include_tombstones: bool = False) -> float:
         """
         This method (named table_load) that returns the current load factor of the hash map.
+        With include_tombstones, tombstones count towards the load as the slots they occupy do when probing.
         """
+        if include_tombstones:
+            return (self._size + self._tombstones) / self._capacity
         return self._size / self._capacity
 
     def empty_buckets(self) -> int:
         """
         This method (named empty_buckets) that returns the number of empty buckets in the hash table.
+        Tombstones count as empty. Every other slot holds one live entry, so this is the capacity minus the size, without visiting any slot (beyond completing an incremental resize in progress).
+        """
+        self._finish_resize()
+        return self._capacity - self._size
+
+    def get_bucket_counts(self) -> dict:
+        """
+        Return the number of empty (never used or emptied by a Robin Hood
+        shift), occupied (live) and tombstoned slots in constant time, as a
+        dict. Unlike empty_buckets, 'empty' leaves out the tombstones.
         """
-        count = 0
-        for i in range(self._capacity):
-            # if the bucket is None or a tombstone
-            if self._buckets[i] is None or self._buckets[i].is_tombstone is True:
-                count += 1  # increment the count
-        return count
+        self._finish_resize()
+        return {'empty': self._capacity - self._size - self._tombstones,
+                'occupied': self._size,
+                'tombstones': self._tombstones}
 
     def resize_table(self, new_capacity: int) -> None:
         """
         This method (named resize_table) changes the capacity of the internal hash table. Al existing key/value pairs remain in the new hash map, and all hash table links must be rehashed. 
-        The method first checks if the new_capacity is not less than 1; if it is, the method does nothing but if new_capacity is 1 or greater, the method resizes the hash table to the next prime number greater than or equal to new_capacity.
+        The method first checks if the new_capacity is not less than 1; if it is, the method does nothing but if new_capacity is 1 or greater, the method resizes the hash table to the next prime number (or power of two, in power-of-two mode) greater than or equal to new_capacity.
         """
-        # remember to rehash non-deleted entries into new table
-        old_capacity = self._capacity
-
-        # copy the old values
-        temp = DynamicArray()  # create a new dynamic array
-        for i in range(old_capacity):
-            # copy the old values into the new array
-            temp.append(self._buckets[i])
-
         if new_capacity < self._size:  # if new capacity is less than the size, do nothing
             return
 
-        # check for prime
-        if self._is_prime(new_capacity):
-            self._capacity = new_capacity  # set new capacity
+        stats = self._stats
+        if stats is not None:
+            stats.resize_started()
+        # only one old table can be migrated from at a time
+        self._finish_resize()
+
+        # round up to a prime (or a power of two)
+        capacity = self._table_capacity(new_capacity)
+
+        # keep doubling while the rehashed entries would push the load past
+        # max_load_factor, exactly as rehashing through put would
+        while (self._size - 1) / capacity >= self._max_load_factor:
+            capacity = self._table_capacity(2 * capacity)
+
+        if not self._incremental_resize:
+            self._rebuild(capacity)
         else:
-            self._capacity = self._next_prime(
-                new_capacity)  # find the next prime number
+            self._resize_count += 1
+            # keep the old table (buckets, capacity and probing state) to
+            # move entries out of, and start with an empty one
+            self._old_table = copy.copy(self)
+            self._migrated = 0
+            self._set_table(capacity)
+            # migrate enough slots per operation to be done before the puts
+            # that fill the new table up to max_load_factor are
+            room = max(int(self._capacity * self._max_load_factor) - self._size, 1)
+            self._migrate_step = -(-self._old_table._capacity // room)
+        if stats is not None:
+            stats.resize_finished()
+
+    def _set_table(self, capacity: int) -> None:
+        """Replace the table with an empty one of the given (valid) capacity"""
+        self._modifications += 1
+        self._capacity = capacity
+        self._mask = self._capacity - 1
+        self._shift = 64 - self._mask.bit_length()
+        self._buckets = DynamicArray([None] * self._capacity)  # all slots empty
+        self._tombstones = 0  # tombstones are not carried over
+
+    def _rebuild(self, capacity: int) -> None:
+        """
+        Rehash the entries of the table into a new one of the given (valid)
+        capacity, doubling it for as long as some entry finds no free slot
+        """
+        self._resize_count += 1
+        # remember to rehash non-deleted entries into new table
+        old_capacity = self._capacity
+        old_buckets = self._buckets  # keep the old table to move entries out of
 
-        self._buckets = DynamicArray()  # reset the buckets array
-        for i in range(self._capacity):  # add new buckets to the array
-            self._buckets.append(None)  # add None to each bucket
-        self._size = 0
-        for i in range(old_capacity):
-            if temp[i] is not None and temp[i].is_tombstone is False:  # not a tombstone and not None
-                self.put(temp[i].key, temp[i].value)  # rehash the values
+        while True:
+            self._set_table(capacity)
+
+            for i in range(old_capacity):
+                entry = old_buckets[i]
+                # not a tombstone and not None
+                if (entry is not None and entry.is_tombstone is False
+                        and not self._rehash_entry(entry)):
+                    break
+            else:
+                return
+            # quadratic probing above a load of .5 can miss every free slot;
+            # start over with a table twice the size
+            capacity = self._table_capacity(2 * capacity)
+
+    def _rehash_entry(self, entry: HashEntry) -> bool:
+        """
+        Store an entry whose key is not in the table, in the first empty slot
+        of its probe sequence (or displacing richer entries, for Robin Hood),
+        when rebuilding or migrating the table; its cached hash makes this
+        pure integer arithmetic.
+        Return False if the probe sequence reaches no empty slot.
+        """
+        index = self._bucket_index(entry.hash)
+        if self._probing != 'robin_hood':
+            buckets = self._buckets.unchecked()
+            step = self._first_step(entry.hash)
+            probes = 1
+            while buckets[index] is not None:
+                if probes == self._capacity:
+                    return False
+                index = (index + step) % self._capacity
+                step += self._step_increment
+                probes += 1
+        self._place_entry(index, entry)
+        return True
 
     def get(self, key: str) -> object:
         """
         This method (named get) returns the value associated with the given key. If the key does not exist in the hash map, the method returns None.
         """
+        if self._old_table is not None:
+            self._migrate(self._migrate_step)
+        if self._stats is not None:
+            self._stats.hash_calls += 1
         hash = self._hash_function(key)
-        index = hash % self._capacity
-        initial_index = index  # save the initial index
-        j = 1
-        while self._buckets[index] is not None:
-            if self._buckets[index].key == key:  # found the key in the table
-                if self._buckets[index].is_tombstone:  # if it is a tombstone
-                    return None
-                else:
-                    # return value if key is found
-                    return self._buckets[index].value
-            else:
-                # quadratic probing to find the spot
-                index = (initial_index + j ** 2) % self._capacity
-                j += 1
-        return None
+        index, found = self._find_slot(key, hash)
+        if found:
+            # return value if key is found
+            return self._buckets.unchecked()[index].value
+        if self._old_table is not None:
+            # the key may not have been migrated yet
+            index, found = self._old_table._find_slot(key, hash)
+            if found:
+                return self._old_table._buckets[index].value
+        return None  # key is not in the table
 
     def contains_key(self, key: str) -> bool:
         """
         This method (named contains_key) returns True if the given key exists in the hash map, and False otherwise. An empty hash map does not contain any keys, so this method would return False.
+        A key stored with the value None is still contained.
         """
         if self._size == 0:
             return False  # empty hash map does not contain any keys
-        # ternary operator to return True or False
-        return True if self.get(key) is not None else False
+        if self._old_table is not None:
+            self._migrate(self._migrate_step)
+        if self._stats is not None:
+            self._stats.hash_calls += 1
+        hash = self._hash_function(key)
+        if self._find_slot(key, hash)[1]:
+            return True
+        return self._old_table is not None and self._old_table._find_slot(key, hash)[1]
 
     def remove(self, key: str) -> None:
         """
         This method (named remove) removes the key/value pair from the hash map using the given key. If the key does not exist in the hash map, the method does nothing.
         """
-        hash = self._hash_function(key)  # hash the key to get the index
-        index = hash % self._capacity  # get the index
-        initial_index = index  # save the initial index for quadratic probing
+        if self._old_table is not None:
+            self._migrate(self._migrate_step)
+        if self._stats is not None:
+            self._stats.hash_calls += 1
+        self._remove_hashed(key, self._hash_function(key))
+
+    def _remove_hashed(self, key: str, hash: int, index: int = None) -> None:
+        """Remove a key whose hash (and possibly home slot) is already known"""
+        index, found = self._find_slot(key, hash, index)
+        if not found:  # if the key is not in the hash map
+            if self._old_table is not None and self._remove_old(key, hash):
+                self._size -= 1  # it had not been migrated yet
+                self._modifications += 1
+            return
+        self._size -= 1
+        self._modifications += 1
+
+        buckets = self._buckets.unchecked()
+        if self._probing == 'robin_hood':
+            # backward-shift deletion: pull every following entry that is not
+            # already in its home slot back by one, so no tombstone is needed
+            next_index = (index + 1) % self._capacity
+            while (buckets[next_index] is not None
+                   and self._bucket_index(buckets[next_index].hash) != next_index):
+                buckets[index] = buckets[next_index]
+                index = next_index
+                next_index = (index + 1) % self._capacity
+            buckets[index] = None
+            return
 
-        if self.contains_key(key):  # if the key is in the hash map
-            j = 1
-            # find the key in the table and set it to a tombstone
-            while self._buckets[index].key != key:
-                # quadratic probing to find the spot to remove
-                index = (initial_index + j ** 2) % self._capacity
-                j += 1
-            self._buckets[index].is_tombstone = True  # set tombstone to true
-            self._size -= 1
+        buckets[index].is_tombstone = True  # set tombstone to true
+        self._tombstones += 1
 
     def clear(self) -> None:
         """
         This method (named clear) removes all key/value pairs from the hash map. IT does not change the underlying hash table capacity.
         """
+        self._old_table = None  # drop any table still being migrated from
+        self._modifications += 1
         self._buckets = DynamicArray()
         i = 0
         while i < self._capacity:  # make sure to set all elements to None
             self._buckets.append(None)
             i += 1
         self._size = 0
+        self._tombstones = 0
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         This method (named get_keys_and_values) returns a DynamicArray of tuples containing all the key/value pairs in the hash map. 
         The order of the tuples in the DynamicArray does not matter.
         """
+        self._finish_resize()
         temp = DynamicArray()  # temp array to hold the key/value pairs
         for i in range(self._capacity):  # loop through the buckets
             # if the bucket is not None and not a tombstone append the key/value pair to the temp array
@@ -246,19 +641,116 @@ class HashMap:
                 temp.append((self._buckets[i].key, self._buckets[i].value))
         return temp  # return the temp array
 
+    def put_many(self, pairs) -> None:
+        """
+        Put every (key, value) pair of an iterable, as put would one by one.
+        The table is resized at most once, up front, to the capacity repeated
+        puts would end at (assuming every key is new), and all keys are
+        hashed in one batch (vectorized with NumPy when possible). Any
+        incremental resize is completed first.
+        """
+        pairs = list(pairs)
+        hashes = hash_many(self._hash_function, [pair[0] for pair in pairs])
+        if self._stats is not None:
+            self._stats.hash_calls += len(pairs)
+
+        capacity = self._capacity
+        while (self._size + len(pairs) - 1) / capacity >= self._max_load_factor:
+            capacity = self._table_capacity(2 * capacity)
+        if capacity != self._capacity:
+            self.resize_table(capacity)
+        elif (self._size + self._tombstones + len(pairs) - 1) / capacity >= self._max_load_factor:
+            # the batch fits, but not alongside the tombstones: drop them
+            self.resize_table(capacity)
+        self._finish_resize()
+
+        capacity = self._capacity
+        for (key, value), hash, index in zip(pairs, hashes, self._bucket_indices(hashes)):
+            # a put can still grow a tiny table, which moves every home slot
+            self._put_hashed(key, value, hash,
+                             index if self._capacity == capacity else None)
+
+    def get_many(self, keys) -> list:
+        """
+        Return a list with the value of every key of an iterable, in order
+        (None for missing keys), hashing all keys in one batch.
+        """
+        self._finish_resize()
+        keys = list(keys)
+        hashes = hash_many(self._hash_function, keys)
+        if self._stats is not None:
+            self._stats.hash_calls += len(keys)
+        buckets = self._buckets.unchecked()
+        values = []
+        for key, hash, index in zip(keys, hashes, self._bucket_indices(hashes)):
+            index, found = self._find_slot(key, hash, index)
+            values.append(buckets[index].value if found else None)
+        return values
+
+    def remove_many(self, keys) -> None:
+        """
+        Remove every key of an iterable, as remove would one by one, hashing
+        all keys in one batch.
+        """
+        self._finish_resize()
+        keys = list(keys)
+        hashes = hash_many(self._hash_function, keys)
+        if self._stats is not None:
+            self._stats.hash_calls += len(keys)
+        for key, hash, index in zip(keys, hashes, self._bucket_indices(hashes)):
+            self._remove_hashed(key, hash, index)
+
+    def keys(self):
+        """Return a lazy iterator over the keys of the hash map (see _entries)"""
+        return (entry.key for entry in self._entries())
+
+    def values(self):
+        """Return a lazy iterator over the values of the hash map (see _entries)"""
+        return (entry.value for entry in self._entries())
+
+    def items(self):
+        """Return a lazy iterator over the (key, value) pairs of the hash map (see _entries)"""
+        return ((entry.key, entry.value) for entry in self._entries())
+
+    def _entries(self):
+        """
+        Yield every live entry of the table, walking the slots in place.
+        Raise RuntimeError if the map is changed (other than by updating a
+        value) while it is iterated.
+        """
+        self._finish_resize()
+        modifications = self._modifications
+        buckets = self._buckets.unchecked()
+        for entry in buckets:
+            if entry is not None and entry.is_tombstone is False:
+                yield entry
+                if self._modifications != modifications:
+                    raise RuntimeError("HashMap changed during iteration")
+
     def __iter__(self):
         """
-        This method (named __iter__) returns an iterator for the hash map. The iterator returns the keys in the hash map in an arbitrary order.
+        This method (named __iter__) returns an iterator for the hash map. The iterator returns the hash entries in the hash map in an arbitrary order.
+        The map is its own iterator and walks the slots in place; use keys, values or items for nested iterations.
         """
-        if not self._size:  # if the size is 0
-            for key, value in self.get_keys_and_values():  # loop through the key/value pairs
-                yield key, value
+        self._finish_resize()
+        self._iter_index = 0  # start at the first slot
+        self._iter_modifications = self._modifications
+        return self
 
     def __next__(self):
         """
-        This method (named __next__) returns the next key in the hash map, based on the current location of the iterator.
+        This method (named __next__) returns the next hash entry in the hash map, based on the current location of the iterator.
+        Raises RuntimeError if the map was changed (other than by updating a value) since __iter__.
         """
-        return self.__iter__()  # return the iterator
+        if self._modifications != self._iter_modifications:
+            raise RuntimeError("HashMap changed during iteration")
+        while self._iter_index < self._capacity:
+            entry = self._buckets.unchecked()[self._iter_index]
+            self._iter_index += 1
+            # skip empty slots and tombstones
+            if entry is not None and entry.is_tombstone is False:
+                return entry
+        raise StopIteration
 
 
 # ------------------- BASIC TESTING ---------------------------------------- #
@@ -473,3 +965,35 @@ if __name__ == "__main__":
     print(m)
     for item in m:
         print('K:', item.key, 'V:', item.value)
+
+    print("\nCounters - random operations")
+    print("----------------------------")
+    # the counts kept up to date by every change must match a full scan
+    import random
+    rnd = random.Random(261)
+    for probing in PROBING_STRATEGIES:
+        m = HashMap(11, hash_function_2, probing=probing, incremental_resize=probing == 'linear')
+        mismatches = 0
+        for step in range(5000):
+            key = 'key' + str(rnd.randrange(500))
+            choice = rnd.random()
+            if choice < 0.5:
+                m.put(key, step)
+            elif choice < 0.95:
+                m.remove(key)
+            elif choice < 0.97:
+                m.put_many(('key' + str(rnd.randrange(500)), step) for _ in range(50))
+            elif choice < 0.999:
+                m.remove_many('key' + str(rnd.randrange(500)) for _ in range(50))
+            else:
+                m.clear()
+            if step % 50 == 0:
+                counts = m.get_bucket_counts()
+                slots = [m._buckets[i] for i in range(m.get_capacity())]
+                scanned = {'empty': sum(1 for entry in slots if entry is None),
+                           'occupied': sum(1 for entry in slots if entry is not None and not entry.is_tombstone),
+                           'tombstones': sum(1 for entry in slots if entry is not None and entry.is_tombstone)}
+                mismatches += (counts != scanned
+                               or m.empty_buckets() != scanned['empty'] + scanned['tombstones']
+                               or m.table_load(True) != (m.get_size() + scanned['tombstones']) / m.get_capacity())
+        print(probing, "mismatches:", mismatches, "resizes:", m.get_resize_count(), m.get_bucket_counts())
@@ -7,28 +7,88 @@
 # This method of collision resolution is used to avoid the clustering problem that occurs with open addressing and linear probing. The hash map is implemented using a dynamic array of linked lists (included in their respective classes) provided in a6_include.py.
 
 
-from a6_include import (DynamicArray, LinkedList,
-                        hash_function_1, hash_function_2)
+import copy
+
+from a6_include import (DynamicArray, HashMapStats, LinkedList, SLNode,
+                        hash_function_1, hash_function_2, hash_many, indices_many,
+                        next_prime)
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: find_mode then always counts with a HashMap
+    np = None
 
 
 class HashMap:
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1,
+                 max_load_factor: float = 1.0,
+                 min_load_factor: float = 0.0,
+                 power_of_two: bool = False,
+                 expected_size: int = 0,
+                 incremental_resize: bool = False,
+                 stats: bool = False) -> None:
         """
         Initialize new HashMap that uses
-        separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
-        """
-        self._buckets = DynamicArray()
+        separate chaining for collision resolution.
+        The table doubles when put is called at a load factor of at least
+        max_load_factor, and halves (never below the initial capacity) when
+        a remove drops the load factor under min_load_factor. A
+        min_load_factor of 0 disables shrinking.
+        With power_of_two the capacity is a power of two instead of a prime,
+        and buckets are indexed by the top bits of the hash times a
+        64-bit golden ratio constant (Fibonacci hashing).
+        With expected_size the table starts large enough to hold that many
+        entries without resizing (see reserve).
+        With incremental_resize a resize only allocates the new table: the
+        nodes of the old one are moved over a few buckets at a time by the
+        following put/get/contains_key/remove calls (lookups check both
+        tables meanwhile), so no single call pays for the whole rehash.
+        With stats the map keeps chain-length, resize and hash call counters
+        up to date as it changes, for get_stats to read in constant time.
+        """
+        if max_load_factor <= 0:
+            raise ValueError("max_load_factor must be positive")
+        if min_load_factor < 0 or 2 * min_load_factor > max_load_factor:
+            # halving the table at min_load_factor must not put it straight
+            # back over max_load_factor, or every remove could thrash
+            raise ValueError(
+                "min_load_factor must be between 0 and max_load_factor / 2")
 
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
+        self._buckets = DynamicArray()
+        self._max_load_factor = max_load_factor
+
+        # capacity must be a prime number (or a power of two)
+        self._power_of_two = power_of_two
+        self._capacity = max(self._table_capacity(capacity),
+                             self._reserve_capacity(expected_size))
+        self._mask = self._capacity - 1
+        self._shift = 64 - self._mask.bit_length()
         for _ in range(self._capacity):
             self._buckets.append(LinkedList())
 
         self._hash_function = function
         self._size = 0
+        self._empty_count = self._capacity  # buckets holding no node
+        self._resize_count = 0  # times the table has been rebuilt
+        # HashMapStats kept up to date if stats is set, else None
+        self._stats = HashMapStats(self._capacity) if stats else None
+
+        self._incremental_resize = incremental_resize
+        self._old_table = None  # map holding the table being migrated from
+        self._migrated = 0  # buckets of the old table already migrated
+        self._migrate_step = 0  # old buckets migrated per operation
+
+        # bumped by every change other than a value update, so iterators can
+        # tell that the map changed under them
+        self._modifications = 0
+        self._iter_index = 0  # next bucket for __next__ to look at
+        self._iter_nodes = iter(())  # nodes left in the current bucket
+        self._iter_modifications = 0
+
+        self._min_load_factor = min_load_factor
+        self._min_capacity = self._capacity
 
     def __str__(self) -> str:
         """
@@ -87,38 +147,191 @@ class HashMap:
         """
         return self._capacity
 
+    def _table_capacity(self, capacity: int) -> int:
+        """
+        Return the capacity the table uses for a requested capacity:
+        the next power of two in power-of-two mode, otherwise the next prime.
+        Primes come from the precomputed ladder in a6_include.py where
+        possible (always, when doubling a table that started on it) and from
+        a Miller-Rabin search otherwise, so huge capacities do not stall.
+        """
+        if self._power_of_two:
+            return 1 << max(capacity - 1, 0).bit_length()
+        # a table needs at least 2 buckets; 1 and below were always rounded to 3
+        return next_prime(capacity) if capacity > 1 else 3
+
+    def _reserve_capacity(self, count: int) -> int:
+        """
+        Return the smallest capacity the table uses that holds count entries
+        without put growing it
+        """
+        # the put of the count-th entry grows a table at a load of at least
+        # max_load_factor, i.e. if (count - 1) / capacity >= max_load_factor
+        capacity = self._table_capacity(int((count - 1) / self._max_load_factor) + 1)
+        while (count - 1) / capacity >= self._max_load_factor:
+            capacity = self._table_capacity(capacity + 1)
+        return capacity
+
+    def get_resize_count(self) -> int:
+        """Return the number of times the table has been resized (rehashed)"""
+        return self._resize_count
+
+    def get_stats(self) -> dict:
+        """
+        Return the statistics of a map built with stats=True: the chain-length
+        histogram of the table ({length: buckets}, including the empty
+        buckets, of the new table only during an incremental resize), the
+        longest chain, the number of resizes, the total time spent resizing
+        and the number of keys hashed. Reading them costs no scan of the table.
+        """
+        stats = self._stats
+        if stats is None:
+            raise RuntimeError("stats are disabled (build the map with stats=True)")
+        return {'size': self._size,
+                'capacity': self._capacity,
+                'chain_lengths': stats.histogram(),
+                'max_chain': stats.max_length,
+                'empty_buckets': stats.lengths[0],
+                'resizes': self._resize_count,
+                'resize_seconds': stats.resize_seconds,
+                'hash_calls': stats.hash_calls}
+
+    def reserve(self, count: int) -> None:
+        """
+        Grow the table, if needed, so that it holds count entries in total
+        without resizing again. A table that is already large enough is
+        left alone (reserve never shrinks it).
+        """
+        capacity = self._reserve_capacity(count)
+        if capacity > self._capacity:
+            self.resize_table(capacity)
+
+    def _bucket_index(self, hash: int) -> int:
+        """Return the index of the bucket for a (cached) hash"""
+        if self._power_of_two:
+            # Fibonacci hashing: multiply by 2^64 / golden ratio and keep the
+            # top bits, so every bit of a weak hash still affects the index
+            return ((hash * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> self._shift
+        return hash % self._capacity
+
+    def _bucket_indices(self, hashes: list) -> list:
+        """Return the bucket index of every hash in a list (see _bucket_index)"""
+        return indices_many(hashes, self._capacity,
+                            self._shift if self._power_of_two else None)
+
+    def _old_bucket(self, hash: int) -> LinkedList:
+        """
+        During an incremental resize, return the bucket of the old table for
+        a hash (emptied once it has been migrated)
+        """
+        return self._old_table._buckets.unchecked()[self._old_table._bucket_index(hash)]
+
+    def _migrate(self, count: int) -> None:
+        """
+        Move the nodes of the next count buckets of the old table into the
+        current one, and drop the old table once all of them are moved
+        """
+        stats = self._stats
+        if stats is not None:
+            stats.resize_started()
+        old_table = self._old_table
+        old_buckets = old_table._buckets.unchecked()
+        buckets = self._buckets.unchecked()
+        end = min(self._migrated + count, old_table._capacity)
+        for i in range(self._migrated, end):
+            # move every node exactly once into its new bucket using its
+            # cached hash; keys are already unique, so no contains check (or
+            # new node) is needed. The iterator steps past a node before it
+            # is relinked, so moving it is safe.
+            for node in old_buckets[i]:
+                bucket = buckets[self._bucket_index(node.hash)]
+                bucket.insert_node(node)
+                if bucket.length() == 1:
+                    self._empty_count -= 1
+                if stats is not None:
+                    stats.count(bucket.length())
+                    stats.uncount(bucket.length() - 1)
+            # the moved nodes still hang off the old list: replace it
+            old_buckets[i] = LinkedList()
+        self._migrated = end
+        if end == old_table._capacity:
+            self._old_table = None
+        if stats is not None:
+            stats.resize_finished()
+
+    def _finish_resize(self) -> None:
+        """Complete the incremental resize in progress, if any"""
+        if self._old_table is not None:
+            self._migrate(self._old_table._capacity)
+
     # ------------------------------------------------------------------ #
 
     def put(self, key: str, value: object) -> None:
         """
         This method (named put) updates the key/value pair in the hash map. If the given key already exists in the hash map, its associated value must be replaced with the new value. 
         If the given key does not exist in the hash map, a new key/value pair is added. 
-        """
-        hash = self._hash_function(key)
-        index = hash % self._capacity  # index of bucket in hash map
-        if self._buckets[index].contains(key):
+        The table is doubled first if the load factor has reached max_load_factor.
+        """
+        if self._old_table is not None:
+            self._migrate(self._migrate_step)
+        if self.table_load() >= self._max_load_factor:
+            # double the capacity (resize_table rounds it up to a valid one)
+            self.resize_table(2 * self._capacity)
+
+        if self._stats is not None:
+            self._stats.hash_calls += 1
+        self._put_hashed(key, value, self._hash_function(key))
+
+    def _put_hashed(self, key: str, value: object, hash: int, index: int = None) -> None:
+        """
+        Put a key whose hash (and possibly bucket index) is already known,
+        without any resize check
+        """
+        if self._old_table is not None:
+            # the key may not have been migrated yet
+            node = self._old_bucket(hash).contains(key, hash)
+            if node is not None:
+                node.value = value
+                return
+
+        if index is None:
+            index = self._bucket_index(hash)  # index of bucket in hash map
+        node = self._buckets.unchecked()[index].contains(key, hash)
+        if node is not None:
             # if key already exists, update value
-            for node in self._buckets[index]:
-                if node.key == key:
-                    node.value = value
+            node.value = value
         else:
-            # if key does not exist, add key/value pair
-            self._buckets[index].insert(key, value)
+            # if key does not exist, add key/value pair (and its hash)
+            bucket = self._buckets.unchecked()[index]
+            bucket.insert(key, value, hash)
             self._size += 1
+            self._modifications += 1
+            if bucket.length() == 1:
+                self._empty_count -= 1
+            if self._stats is not None:
+                self._stats.count(bucket.length())
+                self._stats.uncount(bucket.length() - 1)
 
     def empty_buckets(self) -> int:
         """
         This method (named empty_buckets) returns the number of empty buckets in the hash table.
+        The count is kept up to date by every change, so no bucket is visited (beyond completing an incremental resize in progress).
         """
-        count = 0
-        for i in range(self._capacity):  # iterate through hash map and count empty buckets
-            if self._buckets[i].length() == 0:
-                count += 1
-        return count
+        self._finish_resize()
+        return self._empty_count
 
-    def table_load(self) -> float:
+    def get_bucket_counts(self) -> dict:
+        """
+        Return the number of empty and occupied buckets (and of tombstones,
+        always 0 with separate chaining) in constant time, as a dict
+        """
+        empty = self.empty_buckets()
+        return {'empty': empty, 'occupied': self._capacity - empty, 'tombstones': 0}
+
+    def table_load(self, include_tombstones: bool = False) -> float:
         """
         This method (named table_load) returns the current hash table load factor.
+        include_tombstones is accepted for symmetry with the open addressing map; separate chaining leaves no tombstones.
         """
         return self._size / self._capacity
 
@@ -126,6 +339,8 @@ class HashMap:
         """
         This method (named clear) removes all key/value pairs from the hash map. IT does not change the underlying hash table capacity.
         """
+        self._old_table = None  # drop any table still being migrated from
+        self._modifications += 1
         self._buckets = DynamicArray()  # create new DynamicArray
         i = 0
         while i < self._capacity:
@@ -133,53 +348,75 @@ class HashMap:
             self._buckets.append(LinkedList())
             i += 1
         self._size = 0
+        self._empty_count = self._capacity
+        if self._stats is not None:
+            self._stats.lengths = [self._capacity]
+            self._stats.max_length = 0
 
     def resize_table(self, new_capacity: int) -> None:
         """
         This method (named resize_table) changes the capacity of the internal hash table. Al existing key/value pairs remain in the new hash map, and all hash table links must be rehashed. 
-        The method first checks if the new_capacity is not less than 1; if it is, the method does nothing but if new_capacity is 1 or greater, the method resizes the hash table to the next prime number greater than or equal to new_capacity.
+        The method first checks if the new_capacity is not less than 1; if it is, the method does nothing but if new_capacity is 1 or greater, the method resizes the hash table to the next prime number (or power of two, in power-of-two mode) greater than or equal to new_capacity.
         """
-        old_capacity = self._capacity  # save old capacity to iterate through old hash map
-        temp = DynamicArray()
-        for i in range(old_capacity):  # create new DynamicArray to store old hash map
-            # add old hash map to new DynamicArray
-            temp.append(self._buckets[i])
-
         if new_capacity < 1:
             return
-        # if new_capacity is prime, set new capacity to new_capacity
-        if self._is_prime(new_capacity):
-            self._capacity = new_capacity  # set new capacity to new_capacity
+        self._resize_count += 1
+        self._modifications += 1
+        stats = self._stats
+        if stats is not None:
+            stats.resize_started()
+
+        # only one old table can be migrated from at a time
+        self._finish_resize()
+        # keep the old table (buckets, capacity and shift) to move nodes out of
+        old_table = copy.copy(self)
+
+        # round new_capacity up to a prime (or a power of two)
+        self._capacity = self._table_capacity(new_capacity)
+        self._mask = self._capacity - 1
+        self._shift = 64 - self._mask.bit_length()
+        # create new DynamicArray of empty LinkedLists to store new hash map
+        self._buckets = DynamicArray([LinkedList() for _ in range(self._capacity)])
+        self._empty_count = self._capacity  # until nodes are migrated in
+        if stats is not None:
+            # the chains are counted again as their nodes are migrated
+            stats.lengths = [self._capacity]
+            stats.max_length = 0
+
+        self._old_table = old_table
+        self._migrated = 0
+        if not self._incremental_resize:
+            self._finish_resize()
+        elif self._max_load_factor == float('inf'):
+            # the table never fills up, so there is no deadline to spread the
+            # migration over: do it all on the next operation
+            self._migrate_step = old_table._capacity
         else:
-            self._capacity = self._next_prime(new_capacity)
-        self._buckets = DynamicArray()  # create new DynamicArray to store new hash map
-        for i in range(self._capacity):
-            # add empty LinkedLists to new hash map to be filled
-            self._buckets.append(LinkedList())
-        self._size = 0
-        for i in range(old_capacity):
-            # iterate through old hash map and add key/value pairs to new hash map
-            for node in temp[i]:
-                if node is not None:  # if node is not empty, add key/value pair to new hash map
-                    current = node
-                    while current is not None:  # iterate through LinkedList and add key/value pairs to new hash map
-                        # add key/value pair to new hash map using put method
-                        self.put(current.key, current.value)
-                        current = current.next  # move to next node in LinkedList and return value
+            # migrate enough buckets per operation to be done before the
+            # puts that fill the new table up to max_load_factor are
+            room = max(int(self._capacity * self._max_load_factor) - self._size, 1)
+            self._migrate_step = -(-old_table._capacity // room)
+        if stats is not None:
+            stats.resize_finished()
 
     def get(self, key: str):
         """
         This method (named get) returns the value associated with the given key. If the key does not exist in the hash map, the method returns None.
         """
+        if self._old_table is not None:
+            self._migrate(self._migrate_step)
+        if self._stats is not None:
+            self._stats.hash_calls += 1
         hash = self._hash_function(key)
-        index = hash % self._capacity  # index of bucket in hash map
+        index = self._bucket_index(hash)  # index of bucket in hash map
+        # walk the LinkedList, comparing cached hashes before keys
+        node = self._buckets.unchecked()[index].contains(key, hash)
+        if node is None and self._old_table is not None:
+            node = self._old_bucket(hash).contains(key, hash)
         # return None if key not in hash map
-        if self._buckets[index] is None:
+        if node is None:
             return None
-        # iterate through LinkedList and return value if key exists
-        for node in self._buckets[index]:
-            if node.key == key:
-                return node.value
+        return node.value
 
     def contains_key(self, key: str) -> bool:
         """
@@ -187,40 +424,131 @@ class HashMap:
         """
         if self._size == 0:  # if hash map is empty, return False
             return False
+        if self._old_table is not None:
+            self._migrate(self._migrate_step)
 
         # hash key to get index of bucket in hash map
+        if self._stats is not None:
+            self._stats.hash_calls += 1
         hash = self._hash_function(key)
-        index = hash % self._capacity  # index of bucket in hash map
+        index = self._bucket_index(hash)  # index of bucket in hash map
 
-        if self._buckets[index] is None:  # if bucket is empty, return False
-            return False
-
-        # iterate through LinkedList and return True if key exists
-        for node in self._buckets[index]:
-            if node.key == key:
-                return True
-        return False
+        # walk the LinkedList and return True if key exists
+        if self._buckets.unchecked()[index].contains(key, hash) is not None:
+            return True
+        return (self._old_table is not None
+                and self._old_bucket(hash).contains(key, hash) is not None)
 
     def remove(self, key: str) -> None:
         """
         This method (named remove) removes the key/value pair from the hash map using the given key. If the key does not exist in the hash map, the method does nothing.
+        If min_load_factor is set and the load factor drops below it, the table is halved.
         """
+        if self._old_table is not None:
+            self._migrate(self._migrate_step)
+        if self._stats is not None:
+            self._stats.hash_calls += 1
         hash = self._hash_function(
             key)  # hash key to get index of bucket in hash map
-        index = hash % self._capacity
-
-        # iterate through LinkedList and remove key/value pair if key exists
-        for node in self._buckets[index]:
-            if node.key == key:
-                # remove key/value pair from LinkedList
-                self._buckets[index].remove(key)
+        index = self._bucket_index(hash)
+
+        # remove key/value pair from LinkedList if key exists
+        bucket = self._buckets.unchecked()[index]
+        removed = bucket.remove(key, hash)
+        if removed and bucket.length() == 0:
+            self._empty_count += 1
+        if removed and self._stats is not None:
+            self._stats.count(bucket.length())
+            self._stats.uncount(bucket.length() + 1)
+        if not removed and self._old_table is not None:
+            removed = self._old_bucket(hash).remove(key, hash)
+        if not removed:
+            return
+        self._size -= 1
+        self._modifications += 1
+
+        if (self._capacity > self._min_capacity
+                and self.table_load() < self._min_load_factor):
+            # halve the capacity, but never below the initial capacity
+            self.resize_table(max(self._capacity // 2, self._min_capacity))
+
+    def put_many(self, pairs) -> None:
+        """
+        Put every (key, value) pair of an iterable, as put would one by one.
+        The table is grown at most once, up front, to the capacity repeated
+        puts would end at (assuming every key is new), and all keys are
+        hashed in one batch (vectorized with NumPy when possible). Any
+        incremental resize is completed first.
+        """
+        pairs = list(pairs)
+        hashes = hash_many(self._hash_function, [pair[0] for pair in pairs])
+        if self._stats is not None:
+            self._stats.hash_calls += len(pairs)
+
+        capacity = self._capacity
+        while (self._size + len(pairs) - 1) / capacity >= self._max_load_factor:
+            capacity = self._table_capacity(2 * capacity)
+        if capacity != self._capacity:
+            self.resize_table(capacity)
+        self._finish_resize()
+
+        for (key, value), hash, index in zip(pairs, hashes, self._bucket_indices(hashes)):
+            self._put_hashed(key, value, hash, index)
+
+    def get_many(self, keys) -> list:
+        """
+        Return a list with the value of every key of an iterable, in order
+        (None for missing keys), hashing all keys in one batch.
+        """
+        self._finish_resize()
+        keys = list(keys)
+        hashes = hash_many(self._hash_function, keys)
+        if self._stats is not None:
+            self._stats.hash_calls += len(keys)
+        buckets = self._buckets.unchecked()
+        values = []
+        for key, hash, index in zip(keys, hashes, self._bucket_indices(hashes)):
+            node = buckets[index].contains(key, hash)
+            values.append(None if node is None else node.value)
+        return values
+
+    def remove_many(self, keys) -> None:
+        """
+        Remove every key of an iterable, as remove would one by one, hashing
+        all keys in one batch. If min_load_factor is set, the table is shrunk
+        at most once, after the last removal.
+        """
+        self._finish_resize()
+        keys = list(keys)
+        hashes = hash_many(self._hash_function, keys)
+        stats = self._stats
+        if stats is not None:
+            stats.hash_calls += len(keys)
+        buckets = self._buckets.unchecked()
+        for key, hash, index in zip(keys, hashes, self._bucket_indices(hashes)):
+            if buckets[index].remove(key, hash):
                 self._size -= 1
+                self._modifications += 1
+                if buckets[index].length() == 0:
+                    self._empty_count += 1
+                if stats is not None:
+                    stats.count(buckets[index].length())
+                    stats.uncount(buckets[index].length() + 1)
+
+        capacity = self._capacity
+        while (capacity > self._min_capacity
+               and self._size / capacity < self._min_load_factor):
+            capacity = max(capacity // 2, self._min_capacity)
+        if capacity != self._capacity:
+            self.resize_table(capacity)
+        self._finish_resize()
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         This method (named get_keys_and_values) returns a DynamicArray of tuples containing all the key/value pairs in the hash map. 
         The order of the tuples in the DynamicArray does not matter.
         """
+        self._finish_resize()
         temp = DynamicArray()
 
         # iterate through hash map and add key/value pairs to DynamicArray
@@ -232,10 +560,64 @@ class HashMap:
                     temp.append((node.key, node.value))
         return temp
 
+    def keys(self):
+        """Return a lazy iterator over the keys of the hash map (see _nodes)"""
+        return (node.key for node in self._nodes())
+
+    def values(self):
+        """Return a lazy iterator over the values of the hash map (see _nodes)"""
+        return (node.value for node in self._nodes())
+
+    def items(self):
+        """Return a lazy iterator over the (key, value) pairs of the hash map (see _nodes)"""
+        return ((node.key, node.value) for node in self._nodes())
+
+    def _nodes(self):
+        """
+        Yield every node of the table, walking the buckets in place. Raise
+        RuntimeError if the map is changed (other than by updating a value)
+        while it is iterated.
+        """
+        self._finish_resize()
+        modifications = self._modifications
+        for bucket in self._buckets.unchecked():
+            for node in bucket:
+                yield node
+                if self._modifications != modifications:
+                    raise RuntimeError("HashMap changed during iteration")
+
+    def __iter__(self):
+        """
+        This method (named __iter__) returns an iterator for the hash map. The iterator returns the nodes (with key and value) in the hash map in an arbitrary order.
+        The map is its own iterator and walks the buckets in place; use keys, values or items for nested iterations.
+        """
+        self._finish_resize()
+        self._iter_index = 0
+        self._iter_nodes = iter(())
+        self._iter_modifications = self._modifications
+        return self
+
+    def __next__(self):
+        """
+        This method (named __next__) returns the next node in the hash map, based on the current location of the iterator.
+        Raises RuntimeError if the map was changed (other than by updating a value) since __iter__.
+        """
+        if self._modifications != self._iter_modifications:
+            raise RuntimeError("HashMap changed during iteration")
+        while True:
+            node = next(self._iter_nodes, None)
+            if node is not None:
+                return node
+            if self._iter_index >= self._capacity:
+                raise StopIteration
+            self._iter_nodes = iter(self._buckets[self._iter_index])
+            self._iter_index += 1
+
     def get_buckets(self) -> DynamicArray:
         """
         This method (named get_buckets) returns a DynamicArray of LinkedLists containing all the key/value pairs in the hash map.
         """
+        self._finish_resize()
         return self._buckets
 
     def get_function(self):
@@ -250,33 +632,60 @@ def find_mode(da: DynamicArray) -> (DynamicArray, int):
     This function (named find_mode) takes a DynamicArray of integers and returns a tuple containing a DynamicArray of the mode(s) and the number of times the mode(s) occur.
     If there is more than one value with the highest frequency, all values at that frequency should be included in the array being returned (the order does not matter). 
     If there is only one mode, the dynamic array will only contain that value.
+    The modes are returned in the order they first occur in da. If NumPy is installed, an array of only ints (or only floats) is counted with it; anything else is counted by _count_modes.
+    """
+    values = da.unchecked()
+    if np is not None and len(values) >= 64:
+        result = _numpy_modes(values)
+        if result is not None:
+            return result
+    return _count_modes(values)
+
+
+def _count_modes(values: list) -> (DynamicArray, int):
     """
-    map = HashMap()
-    return_arr = DynamicArray()  # create DynamicArray to store mode(s)
-    max_frequency = 1
-    # iterate through DynamicArray and add key/value pairs to HashMap
-    for i in range(da.length()):
-        hash = map.get_function()(da[i])
-        index = hash % map.get_capacity()
-        if map.contains_key(da[i]):
-            # get value of key in HashMap and increment by 1
-            value = map.get_buckets()[index].contains(da[i]).value
-            if value is not None:
-                count = value + 1
-                if count >= max_frequency:  # if count is greater than or equal to max_frequency, set max_frequency to count
-                    max_frequency = count
-                map.put(da[i], count)
+    Return (modes, frequency) for a list of hashable values, counting them
+    in a HashMap presized to len(values) entries: every value is hashed once
+    (with the built-in hash, in one batch) and found or inserted with one
+    walk of its chain
+    """
+    counts = HashMap(11, hash)
+    counts.reserve(len(values))
+    buckets = counts._buckets.unchecked()
+    hashes = hash_many(hash, values)
+    nodes = []  # the node of every distinct value, in order of first occurrence
+    for value, value_hash, index in zip(values, hashes, counts._bucket_indices(hashes)):
+        node = buckets[index].contains(value, value_hash)
+        if node is not None:
+            node.value += 1  # the node's value is the count
         else:
-            map.put(da[i], 1)  # add key/value pair to HashMap
-    # iterate through HashMap and add mode(s) to DynamicArray
-    for i in range(map.get_capacity()):
-        # iterate through LinkedList and add mode(s) to DynamicArray
-        for node in map.get_buckets()[i]:
-            if node.value == max_frequency:  # if value is equal to max_frequency, add key to DynamicArray
-                # add mode(s) to DynamicArray to be returned by function
-                return_arr.append(node.key)
-    # return tuple containing DynamicArray of mode(s) and number of times mode(s) occur
-    return return_arr, max_frequency
+            node = SLNode(value, 1, None, value_hash)
+            buckets[index].insert_node(node)
+            nodes.append(node)
+
+    frequency = max((node.value for node in nodes), default=1)
+    return DynamicArray([node.key for node in nodes if node.value == frequency]), frequency
+
+
+def _numpy_modes(values: list):
+    """
+    Return (modes, frequency) for a list of only ints or only floats counted
+    with NumPy (sorting them with np.unique), or None for any other list,
+    including ints beyond 64 bits and floats with a NaN (which equals no value)
+    """
+    types = set(map(type, values))
+    if types != {int} and types != {float}:
+        return None
+    try:
+        array = np.array(values)
+    except OverflowError:
+        return None
+    if array.dtype.kind not in 'iuf' or (array.dtype.kind == 'f' and np.isnan(array).any()):
+        return None
+    _, first, counts = np.unique(array, return_index=True, return_counts=True)
+    frequency = int(counts.max())
+    # first holds the index of the first occurrence of every distinct value
+    return DynamicArray(array[np.sort(first[counts == frequency])].tolist()), frequency
 
 
 # ------------------- BASIC TESTING ---------------------------------------- #
@@ -485,3 +894,54 @@ if __name__ == "__main__":
         da = DynamicArray(case)
         mode, frequency = find_mode(da)
         print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}\n")
+
+    print("\nCounters - random operations")
+    print("----------------------------")
+    # the counts kept up to date by every change must match a full scan
+    import random
+    rnd = random.Random(261)
+    for incremental_resize in (False, True):
+        m = HashMap(11, hash_function_1, min_load_factor=0.25, incremental_resize=incremental_resize)
+        mismatches = 0
+        for step in range(5000):
+            key = 'key' + str(rnd.randrange(500))
+            choice = rnd.random()
+            if choice < 0.5:
+                m.put(key, step)
+            elif choice < 0.95:
+                m.remove(key)
+            elif choice < 0.97:
+                m.put_many(('key' + str(rnd.randrange(500)), step) for _ in range(50))
+            elif choice < 0.999:
+                m.remove_many('key' + str(rnd.randrange(500)) for _ in range(50))
+            else:
+                m.clear()
+            if step % 50 == 0:
+                counts = m.get_bucket_counts()
+                empty = sum(1 for i in range(m.get_capacity()) if m.get_buckets()[i].length() == 0)
+                mismatches += (counts['empty'] != empty or m.empty_buckets() != empty
+                               or counts['occupied'] != m.get_capacity() - empty)
+        print("incremental_resize:", incremental_resize, "mismatches:", mismatches,
+              "resizes:", m.get_resize_count(), m.get_bucket_counts())
+
+    print("\nfind_mode - NumPy and HashMap counting agree")
+    print("--------------------------------------------")
+    # both return the modes in order of first occurrence, so the results
+    # must be identical; lists NumPy cannot count exactly fall back
+    rnd = random.Random(261)
+    mismatches = 0
+    for trial in range(200):
+        size = rnd.randrange(64, 2000)
+        spread = rnd.choice([3, 50, 10 ** 6])
+        if trial % 2:
+            values = [rnd.randrange(-spread, spread) for _ in range(size)]
+        else:
+            values = [rnd.choice((1.0, -1.0)) * (rnd.randrange(spread) / 4) for _ in range(size)]  # 0.0 and -0.0
+        mode, frequency = _count_modes(values)
+        expected = (mode.unchecked(), frequency)
+        mode, frequency = _numpy_modes(values)
+        mismatches += (mode.unchecked(), frequency) != expected
+    print("mismatches:", mismatches)
+    for values in ([2 ** 70, 2 ** 70, 1] * 30, [float('nan'), 1.0, 1.0] * 30, [True, 1, 2] * 30):
+        mode, frequency = find_mode(DynamicArray(values))
+        print(f"Mode : {mode}, Frequency: {frequency}")
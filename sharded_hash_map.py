@@ -0,0 +1,241 @@
+# Course: CS261 - Data Structures
+# Assignment: Assignment 6: HashMap Implementation
+# Description: A sharded front end that hash-partitions keys across worker processes, each holding its own separate
+# chaining (hash_map_sc.py) or open addressing (hash_map_oa.py) HashMap, so a map can use more than one core.
+# The front end talks to every worker over a pipe; the batch methods send one message per shard and let the
+# workers run in parallel.
+
+
+import multiprocessing
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_1, hash_function_crc32
+
+
+# map modules a shard can be built from
+SHARD_TYPES = {'sc': hash_map_sc, 'oa': hash_map_oa}
+
+
+def _serve(connection, map_type: str, capacity: int, function: callable, options: dict) -> None:
+    """
+    Run one shard: build its HashMap, then answer (method name, args)
+    requests from the front end until it is told to stop (None).
+    Every reply is (True, result), or (False, exception) if the call raised;
+    the first one tells whether the HashMap could be built.
+    """
+    try:
+        shard = SHARD_TYPES[map_type].HashMap(capacity, function, **options)
+    except Exception as error:
+        connection.send((False, error))
+        connection.close()
+        return
+    connection.send((True, None))
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        method, args = request
+        try:
+            result = getattr(shard, method)(*args)
+        except Exception as error:
+            connection.send((False, error))
+        else:
+            connection.send((True, result))
+    connection.close()
+
+
+class ShardedHashMap:
+    def __init__(self,
+                 workers: int = 4,
+                 map_type: str = 'sc',
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 **options) -> None:
+        """
+        Initialize a HashMap split across workers processes. Every key
+        belongs to the shard hash_function_crc32(key) % workers, whatever
+        the shards' own hash function is, so keys partition the same way in
+        every process. Each shard is a map_type ('sc' or 'oa') HashMap built
+        with capacity, function and any further keyword options; function
+        must be picklable (a module-level function).
+        Single-key calls cost one round trip to a worker; the batch methods
+        cost one round trip per shard, with all shards working at once.
+        Call close (or use the map as a context manager) to stop the workers.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if map_type not in SHARD_TYPES:
+            raise ValueError(f"map_type must be one of {tuple(SHARD_TYPES)}")
+        self._workers = workers
+        self._connections = []
+        self._processes = []
+        for _ in range(workers):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_serve, args=(worker_connection, map_type, capacity, function, options),
+                daemon=True)
+            process.start()
+            worker_connection.close()  # only the worker uses its end
+            self._connections.append(connection)
+            self._processes.append(process)
+        # wait until every shard is built, then raise the error of one that was not
+        errors = []
+        for shard in range(workers):
+            try:
+                self._receive(shard)
+            except Exception as error:
+                errors.append(error)
+        if errors:
+            self.close()
+            raise errors[0]
+
+    def __enter__(self) -> "ShardedHashMap":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop every worker process (the map cannot be used afterwards)"""
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass  # the worker has already exited
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections, self._processes = [], []
+
+    def _shard(self, key: str) -> int:
+        """Return the shard a key belongs to"""
+        return hash_function_crc32(key) % self._workers
+
+    def _call(self, shard: int, method: str, *args):
+        """Call a method of one shard's HashMap and return its result"""
+        self._connections[shard].send((method, args))
+        return self._receive(shard)
+
+    def _receive(self, shard: int):
+        """Return the reply to the request last sent to a shard, raising its exception if it failed"""
+        ok, result = self._connections[shard].recv()
+        if not ok:
+            raise result
+        return result
+
+    def _call_all(self, method: str, args_by_shard: list) -> list:
+        """
+        Call a method on every shard whose args are not None, all sends
+        first so the shards work in parallel, and return their results by
+        shard (None for shards not called)
+        """
+        for shard, args in enumerate(args_by_shard):
+            if args is not None:
+                self._connections[shard].send((method, args))
+        return [self._receive(shard) if args is not None else None
+                for shard, args in enumerate(args_by_shard)]
+
+    def _partition(self, items, key_of=lambda item: item) -> list:
+        """Split items into one list per shard, in order, by the shard of key_of(item)"""
+        parts = [[] for _ in range(self._workers)]
+        for item in items:
+            parts[self._shard(key_of(item))].append(item)
+        return parts
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """Add a key/value pair to its shard, or update its value"""
+        self._call(self._shard(key), 'put', key, value)
+
+    def get(self, key: str):
+        """Return the value of key, or None if it is not in the map"""
+        return self._call(self._shard(key), 'get', key)
+
+    def contains_key(self, key: str) -> bool:
+        """Return True if key is in the map"""
+        return self._call(self._shard(key), 'contains_key', key)
+
+    def remove(self, key: str) -> None:
+        """Remove key from its shard, if it is there"""
+        self._call(self._shard(key), 'remove', key)
+
+    def put_many(self, pairs) -> None:
+        """Put every (key, value) pair of an iterable, with one message per shard"""
+        parts = self._partition(pairs, lambda pair: pair[0])
+        self._call_all('put_many', [(part,) if part else None for part in parts])
+
+    def get_many(self, keys) -> list:
+        """
+        Return a list with the value of every key of an iterable, in order
+        (None for missing keys), with one message per shard
+        """
+        keys = list(keys)
+        shards = [self._shard(key) for key in keys]
+        parts = [[] for _ in range(self._workers)]
+        for key, shard in zip(keys, shards):
+            parts[shard].append(key)
+        results = self._call_all('get_many', [(part,) if part else None for part in parts])
+        # each shard answers in the order its keys were sent
+        positions = [0] * self._workers
+        values = []
+        for shard in shards:
+            values.append(results[shard][positions[shard]])
+            positions[shard] += 1
+        return values
+
+    def remove_many(self, keys) -> None:
+        """Remove every key of an iterable, with one message per shard"""
+        parts = self._partition(keys)
+        self._call_all('remove_many', [(part,) if part else None for part in parts])
+
+    def get_size(self) -> int:
+        """Return the number of key/value pairs across all shards"""
+        return sum(self._call_all('get_size', [()] * self._workers))
+
+    def table_load(self) -> float:
+        """Return the load factor of all shards together (entries per bucket)"""
+        capacity = sum(self._call_all('get_capacity', [()] * self._workers))
+        return self.get_size() / capacity
+
+    def clear(self) -> None:
+        """Remove all key/value pairs from every shard"""
+        self._call_all('clear', [()] * self._workers)
+
+    def get_shard_sizes(self) -> list:
+        """Return the number of key/value pairs held by each shard"""
+        return self._call_all('get_size', [()] * self._workers)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """Return a DynamicArray of all (key, value) tuples, shard by shard"""
+        result = DynamicArray()
+        for pairs in self._call_all('get_keys_and_values', [()] * self._workers):
+            for i in range(pairs.length()):
+                result.append(pairs[i])
+        return result
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nSharded - put/get/remove example 1")
+    print("----------------------------------")
+    with ShardedHashMap(4, 'sc', 11, hash_function_1) as m:
+        for i in range(150):
+            m.put('str' + str(i), i * 100)
+        m.remove('str0')
+        print(m.get('str0'), m.get('str1'), m.contains_key('str1'), m.get_size())
+        print(m.get_shard_sizes())
+
+    print("\nSharded - batch example 1")
+    print("-------------------------")
+    with ShardedHashMap(3, 'oa', 11, hash_function_1, probing='linear') as m:
+        m.put_many((str(i), i) for i in range(1000))
+        m.remove_many(str(i) for i in range(0, 1000, 2))
+        values = m.get_many(str(i) for i in range(10))
+        print(values)
+        print(m.get_size(), sum(m.get_shard_sizes()))
+        pairs = m.get_keys_and_values()
+        print(sorted(int(pairs[i][0]) for i in range(pairs.length()))[:5])
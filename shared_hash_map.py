@@ -0,0 +1,605 @@
+# Course: CS261 - Data Structures
+# Assignment: Assignment 6: HashMap Implementation
+# Description: An open addressing hash map (same API and probing as hash_map_oa.py) whose table lives in a
+# multiprocessing.shared_memory block, so one process can build it and any number of others can read it in place.
+# The slots are three arrays of 64-bit integers (hashes, key offsets, value offsets) followed by a data area holding
+# the keys (UTF-8) and the values (pickled).
+
+
+import pickle
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+import hash_map_oa
+from a6_include import DynamicArray, HashEntry, hash_function_1, hash_many
+
+
+# header of a block: magic, then capacity, size, tombstones, end of the used
+# data area, end of the block, power_of_two and probing strategy (index in
+# PROBING_STRATEGIES) as 64-bit integers, then max_load_factor
+_HEADER = struct.Struct('<8s7Qd')
+_MAGIC = b'CS261OA1'
+# positions of the header integers in the _counts view
+_CAPACITY, _SIZE, _TOMBSTONES, _DATA_END, _DATA_LIMIT, _POWER_OF_TWO, _PROBING = range(7)
+
+# key offsets that mark a slot as empty or as a tombstone (data offsets are
+# always past the header)
+_EMPTY = 0
+_TOMBSTONE = 1
+
+# every key and value record is its length followed by its bytes
+_LENGTH = struct.Struct('<I')
+
+# bytes of data area allocated per slot unless data_size asks for more
+_DATA_PER_SLOT = 64
+
+# hashes are stored (and reduced) modulo 2^64
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _open_block(name: str) -> shared_memory.SharedMemory:
+    """Open an existing shared memory block without handing it to a resource tracker of this process's own"""
+    try:
+        return shared_memory.SharedMemory(name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    # before 3.13 opening a block registers it. A process that inherited the
+    # writer's resource tracker (a child started after the block was
+    # created) only repeats the writer's registration, which it must leave
+    # alone: unregistering would race the writer's unlink. Any other process
+    # starts a tracker of its own, which would unlink the block on exit.
+    inherited = resource_tracker._resource_tracker._fd is not None
+    block = shared_memory.SharedMemory(name)
+    if not inherited:
+        resource_tracker.unregister(block._name, 'shared_memory')
+    return block
+
+
+def _private_memory_kb() -> int:
+    """
+    Return the private (anonymous) resident memory of this process in KB,
+    which excludes shared memory blocks, or None where /proc is unavailable
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('RssAnon:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class SharedHashMap(hash_map_oa.HashMap):
+    def __init__(self, capacity: int, function,
+                 power_of_two: bool = False,
+                 probing: str = 'quadratic',
+                 max_load_factor: float = 0.5,
+                 expected_size: int = 0,
+                 data_size: int = 0) -> None:
+        """
+        Initialize new HashMap that uses open addressing exactly as
+        hash_map_oa.HashMap does (see it for the arguments), in a new shared
+        memory block named by the name property. Other processes open the
+        block with SharedHashMap.attach(name, function) and read it in place.
+        Keys are stored as UTF-8 and values pickled (get returns a copy).
+        Hashes are taken modulo 2^64 (which leaves every hash function of
+        a6_include.py unchanged).
+        The block holds the slots plus a data area of data_size bytes (64
+        per slot by default); when either fills up, the table is rebuilt
+        into a new, larger block and the name changes. Readers keep the
+        block they attached to, so build (or reserve) before sharing.
+        Only the creating process may change the map, and it should call
+        unlink (or use the map as a context manager) once readers are done.
+        """
+        if probing not in hash_map_oa.PROBING_STRATEGIES:
+            raise ValueError(f"probing must be one of {hash_map_oa.PROBING_STRATEGIES}")
+        if not 0 < max_load_factor < 1:
+            raise ValueError("max_load_factor must be between 0 and 1")
+        self._hash_function = function
+        self._set_options(probing, power_of_two, max_load_factor)
+        self._writable = True
+        self._block = None
+        capacity = max(self._table_capacity(capacity),
+                       self._reserve_capacity(expected_size))
+        self._create_block(capacity, max(data_size, capacity * _DATA_PER_SLOT))
+
+    @classmethod
+    def attach(cls, name: str, function=hash_function_1) -> "SharedHashMap":
+        """
+        Open, read-only, the map another process created in the block named
+        name; function must be the hash function it was built with
+        """
+        block = _open_block(name)
+        magic, _, _, _, _, _, power_of_two, probing, max_load_factor = _HEADER.unpack_from(block.buf)
+        if magic != _MAGIC:
+            block.close()
+            raise ValueError(f"{name} does not hold a SharedHashMap")
+        self = cls.__new__(cls)
+        self._hash_function = function
+        self._set_options(hash_map_oa.PROBING_STRATEGIES[probing], bool(power_of_two), max_load_factor)
+        self._writable = False
+        self._map_block(block)
+        return self
+
+    def _set_options(self, probing: str, power_of_two: bool, max_load_factor: float) -> None:
+        """Set the probing options and the per-process state hash_map_oa.HashMap keeps"""
+        self._probing = probing
+        self._power_of_two = power_of_two
+        self._max_load_factor = max_load_factor
+        if probing == 'quadratic':
+            self._step_increment = 1 if power_of_two else 2
+        else:
+            self._step_increment = 0
+        self._resize_count = 0
+        self._stats = None  # statistics are not kept for shared tables
+        # a shared table is always rebuilt in one go
+        self._incremental_resize = False
+        self._old_table = None
+        self._modifications = 0
+        self._iter_index = 0
+        self._iter_modifications = 0
+
+    def _create_block(self, capacity: int, data_size: int) -> None:
+        """Create an empty table of the given (valid) capacity in a new block and switch to it"""
+        data_start = _HEADER.size + 24 * capacity
+        # a new block is zero-filled: every slot starts out empty
+        block = shared_memory.SharedMemory(create=True, size=data_start + data_size)
+        _HEADER.pack_into(block.buf, 0, _MAGIC, capacity, 0, 0, data_start, data_start + data_size,
+                          self._power_of_two, hash_map_oa.PROBING_STRATEGIES.index(self._probing),
+                          self._max_load_factor)
+        self._map_block(block)
+
+    def _map_block(self, block: shared_memory.SharedMemory) -> None:
+        """Switch to the table held by block"""
+        self._block = block
+        self._map_buffer(block.buf)
+
+    def _map_buffer(self, buffer: memoryview) -> None:
+        """Switch to the table laid out in buffer, viewing its header and slot arrays in place"""
+        self._data = buffer
+        self._counts = buffer[8:8 + 8 * 7].cast('Q')
+        self._capacity = self._counts[_CAPACITY]
+        self._mask = self._capacity - 1
+        self._shift = 64 - self._mask.bit_length()
+        start, size = _HEADER.size, 8 * self._capacity
+        self._hashes = buffer[start:start + size].cast('Q')
+        self._keys = buffer[start + size:start + 2 * size].cast('Q')
+        self._values = buffer[start + 2 * size:start + 3 * size].cast('Q')
+
+    def _release_views(self) -> None:
+        """Release the views of the current block, which must happen before it is closed"""
+        for view in (self._counts, self._hashes, self._keys, self._values):
+            view.release()
+
+    @property
+    def _size(self) -> int:
+        return self._counts[_SIZE]
+
+    @_size.setter
+    def _size(self, size: int) -> None:
+        self._counts[_SIZE] = size
+
+    @property
+    def _tombstones(self) -> int:
+        return self._counts[_TOMBSTONES]
+
+    @_tombstones.setter
+    def _tombstones(self, tombstones: int) -> None:
+        self._counts[_TOMBSTONES] = tombstones
+
+    @property
+    def name(self) -> str:
+        """Name of the shared memory block holding the table (it changes when the table is rebuilt)"""
+        return self._block.name
+
+    def close(self) -> None:
+        """Detach from the block (the map cannot be used afterwards)"""
+        if self._block is not None:
+            self._release_views()
+            self._block.close()
+            self._block = None
+
+    def unlink(self) -> None:
+        """Detach from the block and destroy it; only the creating process may call this"""
+        self._check_writable()
+        block = self._block
+        self.close()
+        if block is not None:
+            block.unlink()
+
+    def __enter__(self) -> "SharedHashMap":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._writable:
+            self.unlink()
+        else:
+            self.close()
+
+    def _check_writable(self) -> None:
+        """Raise RuntimeError if this process attached to the map rather than created it"""
+        if not self._writable:
+            raise RuntimeError("an attached SharedHashMap is read-only")
+
+    def _record(self, offset: int) -> memoryview:
+        """Return a view of the bytes of the record at offset"""
+        length = _LENGTH.unpack_from(self._data, offset)[0]
+        return self._data[offset + 4:offset + 4 + length]
+
+    def _append_record(self, data: bytes) -> int:
+        """Append a record to the data area, which must have room for it, and return its offset"""
+        offset = self._counts[_DATA_END]
+        _LENGTH.pack_into(self._data, offset, len(data))
+        self._data[offset + 4:offset + 4 + len(data)] = data
+        self._counts[_DATA_END] = offset + 4 + len(data)
+        return offset
+
+    def _has_room(self, size: int) -> bool:
+        """Return True if the data area has room for size more bytes"""
+        return self._counts[_DATA_END] + size <= self._counts[_DATA_LIMIT]
+
+    def _entry(self, index: int) -> HashEntry:
+        """Return the slot at index as a HashEntry (a tombstone for removed entries), or None if it is empty"""
+        key_offset = self._keys[index]
+        if key_offset == _EMPTY:
+            return None
+        if key_offset == _TOMBSTONE:
+            entry = HashEntry(None, None, self._hashes[index])
+            entry.is_tombstone = True
+            return entry
+        return HashEntry(str(self._record(key_offset), 'utf-8'),
+                         pickle.loads(self._record(self._values[index])), self._hashes[index])
+
+    # ------------------------------------------------------------------ #
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        (in the format of hash_map_oa.HashMap)
+        """
+        out = ''
+        for i in range(self._capacity):
+            out += str(i) + ': ' + str(self._entry(i)) + '\n'
+        return out
+
+    def _bucket_indices(self, hashes: list) -> list:
+        """Return the home slot of every hash in a list (see _bucket_index)"""
+        return super()._bucket_indices([hash & _MASK64 for hash in hashes])
+
+    def _find_slot(self, key: str, hash: int, index: int = None) -> (int, bool):
+        """
+        Walk the probe sequence of key once and return (index, found), as
+        hash_map_oa.HashMap._find_slot does, comparing the encoded key with
+        the stored bytes in place
+        """
+        hash &= _MASK64
+        if index is None:
+            index = self._bucket_index(hash)
+        step = self._first_step(hash)
+        first_tombstone = -1  # first reusable slot on the probe sequence
+        robin_hood = self._probing == 'robin_hood'
+        hashes, keys, data = self._hashes, self._keys, self._data
+        key_data = None  # encoded on the first hash match
+
+        j = 0  # slots probed so far, i.e. distance from home for Robin Hood
+        while j < self._capacity:
+            key_offset = keys[index]
+            if key_offset == _EMPTY:
+                return (index if first_tombstone < 0 else first_tombstone), False
+            if key_offset == _TOMBSTONE:
+                if first_tombstone < 0:
+                    first_tombstone = index
+            elif hashes[index] == hash:
+                if key_data is None:
+                    key_data = key.encode()
+                length = _LENGTH.unpack_from(data, key_offset)[0]
+                if length == len(key_data) and data[key_offset + 4:key_offset + 4 + length] == key_data:
+                    return index, True
+            if (robin_hood and key_offset != _TOMBSTONE
+                    and (index - self._bucket_index(hashes[index])) % self._capacity < j):
+                # the key would have been stored before this closer-to-home entry
+                return index, False
+            index = (index + step) % self._capacity
+            step += self._step_increment
+            j += 1
+        return first_tombstone, False
+
+    def _place_slot(self, index: int, hash: int, key_offset: int, value_offset: int) -> None:
+        """
+        Store a slot whose key is not in the table at index, displacing
+        residents for Robin Hood (see hash_map_oa.HashMap._place_entry).
+        The key offset, which marks the slot as taken, is written last.
+        """
+        hashes, keys, values = self._hashes, self._keys, self._values
+        if self._probing == 'robin_hood':
+            distance = (index - self._bucket_index(hash)) % self._capacity
+            while keys[index] != _EMPTY:
+                resident_distance = (index - self._bucket_index(hashes[index])) % self._capacity
+                if resident_distance < distance:
+                    # the poorer slot takes the place; the richer one moves on
+                    resident = hashes[index], keys[index], values[index]
+                    hashes[index], values[index], keys[index] = hash, value_offset, key_offset
+                    hash, key_offset, value_offset = resident
+                    distance = resident_distance
+                index = (index + 1) % self._capacity
+                distance += 1
+        hashes[index] = hash
+        values[index] = value_offset
+        keys[index] = key_offset
+
+    def _rehash_slot(self, hash: int, key_offset: int, value_offset: int) -> bool:
+        """
+        Store a slot whose key is not in the table in the first empty slot of
+        its probe sequence, when rebuilding the table. Return False if the
+        probe sequence reaches no empty slot.
+        """
+        index = self._bucket_index(hash)
+        if self._probing != 'robin_hood':
+            keys = self._keys
+            step = self._first_step(hash)
+            probes = 1
+            while keys[index] != _EMPTY:
+                if probes == self._capacity:
+                    return False
+                index = (index + step) % self._capacity
+                step += self._step_increment
+                probes += 1
+        self._place_slot(index, hash, key_offset, value_offset)
+        return True
+
+    def _rebuild(self, capacity: int, extra_data: int = 0) -> None:
+        """
+        Rehash the live slots into a new block of the given (valid) capacity,
+        copying their records and dropping garbage (tombstones, replaced
+        values), with room for at least extra_data more bytes of data. The
+        old block is destroyed.
+        """
+        self._check_writable()
+        self._resize_count += 1
+        old_block, old_data, old_capacity = self._block, self._data, self._capacity
+        old_hashes, old_keys, old_values = self._hashes, self._keys, self._values
+        old_counts = self._counts
+        live = [i for i in range(old_capacity) if old_keys[i] > _TOMBSTONE]
+        live_data = 0
+        for i in live:
+            for offset in (old_keys[i], old_values[i]):
+                live_data += 4 + _LENGTH.unpack_from(old_data, offset)[0]
+
+        while True:
+            self._create_block(capacity, max(capacity * _DATA_PER_SLOT, 2 * (live_data + extra_data)))
+            end = self._counts[_DATA_END]
+            for i in live:
+                offsets = []
+                for offset in (old_keys[i], old_values[i]):
+                    length = 4 + _LENGTH.unpack_from(old_data, offset)[0]
+                    self._data[end:end + length] = old_data[offset:offset + length]
+                    offsets.append(end)
+                    end += length
+                if not self._rehash_slot(old_hashes[i], *offsets):
+                    break
+            else:
+                break
+            # quadratic probing above a load of .5 can miss every free slot;
+            # start over with a block twice the size
+            block = self._block
+            self._release_views()
+            block.close()
+            block.unlink()
+            capacity = self._table_capacity(2 * capacity)
+
+        self._counts[_DATA_END] = end
+        self._size = len(live)
+        self._modifications += 1
+        for view in (old_counts, old_hashes, old_keys, old_values):
+            view.release()
+        old_block.close()
+        old_block.unlink()
+
+    def _put_hashed(self, key: str, value: object, hash: int, index: int = None) -> None:
+        """
+        Put a key whose hash (and possibly home slot) is already known,
+        without any load check
+        """
+        self._check_writable()
+        hash &= _MASK64
+        value_data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        index, found = self._find_slot(key, hash, index)
+        key_data = b'' if found else key.encode()
+        needed = 4 + len(value_data) + (0 if found else 4 + len(key_data))
+        if not self._has_room(needed):
+            # the data area is full: compact it into a new block and try again
+            self._rebuild(self._capacity, needed)
+            self._put_hashed(key, value, hash)
+            return
+        if found:
+            # the old value record stays behind as garbage until a rebuild
+            self._values[index] = self._append_record(value_data)
+            return
+        if index < 0:
+            # every slot this key can probe is taken: grow and try again
+            self.resize_table(2 * self._capacity)
+            self._put_hashed(key, value, hash)
+            return
+
+        if self._keys[index] == _TOMBSTONE:
+            self._tombstones -= 1
+        self._place_slot(index, hash, self._append_record(key_data), self._append_record(value_data))
+        self._size += 1
+        self._modifications += 1
+
+    def empty_buckets(self) -> int:
+        """
+        This method (named empty_buckets) returns the number of empty buckets in the hash table (tombstones count as empty).
+        """
+        return self._capacity - self._size
+
+    def get(self, key: str) -> object:
+        """
+        This method (named get) returns (a copy of) the value associated with the given key. If the key does not exist in the hash map, the method returns None.
+        """
+        index, found = self._find_slot(key, self._hash_function(key))
+        return pickle.loads(self._record(self._values[index])) if found else None
+
+    def _remove_hashed(self, key: str, hash: int, index: int = None) -> None:
+        """Remove a key whose hash (and possibly home slot) is already known"""
+        self._check_writable()
+        index, found = self._find_slot(key, hash, index)
+        if not found:
+            return
+        self._size -= 1
+        self._modifications += 1
+
+        hashes, keys, values = self._hashes, self._keys, self._values
+        if self._probing == 'robin_hood':
+            # backward-shift deletion, as in hash_map_oa.HashMap
+            next_index = (index + 1) % self._capacity
+            while keys[next_index] != _EMPTY and self._bucket_index(hashes[next_index]) != next_index:
+                hashes[index], keys[index], values[index] = hashes[next_index], keys[next_index], values[next_index]
+                index = next_index
+                next_index = (index + 1) % self._capacity
+            keys[index] = _EMPTY
+            return
+
+        keys[index] = _TOMBSTONE
+        self._tombstones += 1
+
+    def clear(self) -> None:
+        """
+        This method (named clear) removes all key/value pairs from the hash map. It does not change the underlying hash table capacity.
+        """
+        self._check_writable()
+        start = _HEADER.size
+        self._data[start:start + 24 * self._capacity] = bytes(24 * self._capacity)
+        self._counts[_DATA_END] = start + 24 * self._capacity
+        self._size = 0
+        self._tombstones = 0
+        self._modifications += 1
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        This method (named get_keys_and_values) returns a DynamicArray of tuples containing all the key/value pairs in the hash map.
+        """
+        return DynamicArray([(entry.key, entry.value) for entry in self._entries()])
+
+    def get_many(self, keys) -> list:
+        """
+        Return a list with the value of every key of an iterable, in order
+        (None for missing keys), hashing all keys in one batch.
+        """
+        keys = list(keys)
+        hashes = hash_many(self._hash_function, keys)
+        values = []
+        for key, hash, index in zip(keys, hashes, self._bucket_indices(hashes)):
+            index, found = self._find_slot(key, hash, index)
+            values.append(pickle.loads(self._record(self._values[index])) if found else None)
+        return values
+
+    def _entries(self):
+        """
+        Yield every live slot of the table as a HashEntry (holding copies of
+        the key and value). Raise RuntimeError if the map is changed (other
+        than by updating a value) while it is iterated.
+        """
+        modifications = self._modifications
+        for i in range(self._capacity):
+            if self._keys[i] > _TOMBSTONE:
+                yield self._entry(i)
+                if self._modifications != modifications:
+                    raise RuntimeError("HashMap changed during iteration")
+
+    def __next__(self):
+        """
+        This method (named __next__) returns the next hash entry (a copy) in the hash map, based on the current location of the iterator.
+        """
+        if self._modifications != self._iter_modifications:
+            raise RuntimeError("HashMap changed during iteration")
+        while self._iter_index < self._capacity:
+            index = self._iter_index
+            self._iter_index += 1
+            if self._keys[index] > _TOMBSTONE:
+                return self._entry(index)
+        raise StopIteration
+
+
+def _reader_check(name: str, count: int) -> (bool, int):
+    """
+    Attach to a map of the keys 'key0' .. 'key<count - 1>' (each mapped to
+    its number times 2), look every key up and return whether all values
+    were right and how much private memory (KB) the process gained doing
+    so. Runs in the reader processes of the tests below.
+    """
+    before = _private_memory_kb()
+    with SharedHashMap.attach(name, hash_function_1) as m:
+        ok = all(m.get('key' + str(i)) == i * 2 for i in range(count)) and not m.contains_key('key-1')
+        ok = ok and m.get_size() == count
+    after = _private_memory_kb()
+    return ok, (after - before if before is not None else None)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import multiprocessing
+    import random
+
+    from a6_include import hash_function_2, hash_function_crc32
+
+    print("\nShared - put/get/remove example 1")
+    print("---------------------------------")
+    with SharedHashMap(53, hash_function_1) as m:
+        for i in range(150):
+            m.put('str' + str(i), i * 100)
+            if i % 25 == 24:
+                print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+        m.remove('str0')
+        m.put('str1', [1, 'list'])
+        print(m.get('str0'), m.get('str1'), m.contains_key('str1'), m.get_size())
+
+    print("\nShared - __iter__(), __next__() example 1")
+    print("-----------------------------------------")
+    with SharedHashMap(10, hash_function_2) as m:
+        for i in range(5):
+            m.put(str(i), str(i * 24))
+        m.remove('0')
+        m.remove('4')
+        print(m)
+        for item in m:
+            print('K:', item.key, 'V:', item.value)
+
+    print("\nShared - same slots as hash_map_oa.HashMap")
+    print("------------------------------------------")
+    # random puts and removes; both maps must end with every key in the same slot
+    for probing in hash_map_oa.PROBING_STRATEGIES:
+        for power_of_two in (False, True):
+            rnd = random.Random(5)
+            oa = hash_map_oa.HashMap(11, hash_function_crc32, power_of_two, probing)
+            shared = SharedHashMap(11, hash_function_crc32, power_of_two, probing, data_size=256)
+            for _ in range(3000):
+                key = 'k' + str(rnd.randrange(600))
+                if rnd.random() < 0.7:
+                    value = rnd.random()
+                    oa.put(key, value)
+                    shared.put(key, value)
+                else:
+                    oa.remove(key)
+                    shared.remove(key)
+            # tombstones are compared as such: the shared map drops their key and value
+            oa_slots = [oa._buckets[i] for i in range(oa.get_capacity())]
+            shared_slots = [shared._entry(i) for i in range(shared.get_capacity())]
+            same = len(oa_slots) == len(shared_slots) and all(
+                str(a) == str(b) if a is None or not a.is_tombstone else b is not None and b.is_tombstone
+                for a, b in zip(oa_slots, shared_slots))
+            print(f"{probing:>14} power_of_two={power_of_two!s:<5} {same}")
+            shared.unlink()
+
+    print("\nShared - reader processes")
+    print("-------------------------")
+    count, readers = 20000, 4
+    with SharedHashMap(11, hash_function_1, expected_size=count) as m:
+        m.put_many(('key' + str(i), i * 2) for i in range(count))
+        with multiprocessing.Pool(readers) as pool:
+            results = pool.starmap(_reader_check, [(m.name, count)] * readers)
+        for reader, (ok, growth) in enumerate(results):
+            print(f"reader {reader}: all values right: {ok}, private memory gained: {growth} KB")
+        print("resizes while building:", m.get_resize_count())
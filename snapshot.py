@@ -0,0 +1,490 @@
+# Course: CS261 - Data Structures
+# Assignment: Assignment 6: HashMap Implementation
+# Description: Binary snapshots of the separate chaining (hash_map_sc.py) and open addressing (hash_map_oa.py) hash
+# maps. save_snapshot writes a map's table (header, capacity, hash function id, slot arrays and packed key/value data)
+# to a file; open_snapshot maps the file back in as a read-only map that answers lookups straight from the mapped
+# pages, and load_snapshot rebuilds an ordinary (mutable) HashMap from it without calling the hash function.
+
+
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+
+import hash_map_oa
+import hash_map_sc
+import shared_hash_map
+from a6_include import (DynamicArray, HashEntry, LinkedList, SLNode, hash_function_1,
+                        hash_function_2, hash_function_blake2b, hash_function_crc32,
+                        hash_function_fnv1a, hash_many)
+
+
+# hash functions a snapshot can record, by id (their position); other
+# functions cannot be saved, since a reader could not know how to hash keys
+SNAPSHOT_HASH_FUNCTIONS = (hash_function_1, hash_function_2, hash_function_fnv1a,
+                           hash_function_crc32, hash_function_blake2b)
+
+# file header: magic, map kind, hash function id and byte order of the arrays
+# that follow (0 little, 1 big endian); the map's payload starts after it
+_FILE_HEADER = struct.Struct('<8s3Q')
+_FILE_MAGIC = b'CS261MAP'
+_SC, _OA = 0, 1
+
+# SC payload header: magic, capacity, size, power_of_two, minimum capacity,
+# max_load_factor and min_load_factor. It is followed by the index of every
+# bucket's first entry (capacity + 1 of them, the last one being size), then
+# the hashes, key offsets and value offsets of the entries, bucket by bucket
+# in chain order, then the key and value records.
+# The OA payload is laid out exactly as a SharedHashMap block.
+_SC_HEADER = struct.Struct('<8s4Q2d')
+_SC_MAGIC = b'CS261SC1'
+
+
+def _record(data: bytes) -> bytes:
+    """Return data as a record: its length followed by its bytes"""
+    return shared_hash_map._LENGTH.pack(len(data)) + data
+
+
+def _record_at(buffer: memoryview, offset: int) -> memoryview:
+    """Return a view of the bytes of the record at offset in buffer"""
+    length = shared_hash_map._LENGTH.unpack_from(buffer, offset)[0]
+    return buffer[offset + 4:offset + 4 + length]
+
+
+def _sc_payload(m: hash_map_sc.HashMap) -> bytes:
+    """Return the snapshot payload of a separate chaining map"""
+    m._finish_resize()
+    capacity, size = m._capacity, m._size
+    starts, hashes, key_offsets, value_offsets = array('Q'), array('Q'), array('Q'), array('Q')
+    records = bytearray()
+    data_start = _SC_HEADER.size + 8 * (capacity + 1) + 24 * size
+    for bucket in m._buckets.unchecked():
+        starts.append(len(hashes))
+        for node in bucket:
+            hashes.append(node.hash)
+            key_offsets.append(data_start + len(records))
+            records += _record(node.key.encode())
+            value_offsets.append(data_start + len(records))
+            records += _record(pickle.dumps(node.value, pickle.HIGHEST_PROTOCOL))
+    starts.append(size)
+    header = _SC_HEADER.pack(_SC_MAGIC, capacity, size, m._power_of_two, m._min_capacity,
+                             m._max_load_factor, m._min_load_factor)
+    return header + starts.tobytes() + hashes.tobytes() + key_offsets.tobytes() + value_offsets.tobytes() + records
+
+
+def _oa_payload(m: hash_map_oa.HashMap) -> bytes:
+    """Return the snapshot payload of an open addressing map (the layout of a SharedHashMap block)"""
+    m._finish_resize()
+    capacity = m._capacity
+    hashes, key_offsets, value_offsets = array('Q', bytes(8 * capacity)), array('Q', bytes(8 * capacity)), \
+        array('Q', bytes(8 * capacity))
+    records = bytearray()
+    data_start = shared_hash_map._HEADER.size + 24 * capacity
+    for i, entry in enumerate(m._buckets.unchecked()):
+        if entry is None:
+            continue
+        hashes[i] = entry.hash
+        if entry.is_tombstone:
+            # kept, so the probe sequences that pass it still reach their keys
+            key_offsets[i] = shared_hash_map._TOMBSTONE
+            continue
+        key_offsets[i] = data_start + len(records)
+        records += _record(entry.key.encode())
+        value_offsets[i] = data_start + len(records)
+        records += _record(pickle.dumps(entry.value, pickle.HIGHEST_PROTOCOL))
+    data_end = data_start + len(records)
+    header = shared_hash_map._HEADER.pack(
+        shared_hash_map._MAGIC, capacity, m._size, m._tombstones, data_end, data_end, m._power_of_two,
+        hash_map_oa.PROBING_STRATEGIES.index(m._probing), m._max_load_factor)
+    return header + hashes.tobytes() + key_offsets.tobytes() + value_offsets.tobytes() + records
+
+
+def save_snapshot(m, path: str) -> None:
+    """
+    Write a snapshot of a separate chaining or open addressing HashMap (or
+    of a SharedHashMap, or of a map opened by open_snapshot) to path. The
+    file is written next to path and then renamed over it, so readers never
+    see a partial snapshot. The map must use one of the
+    SNAPSHOT_HASH_FUNCTIONS and its values must be picklable.
+    """
+    function = m._hash_function
+    if function not in SNAPSHOT_HASH_FUNCTIONS:
+        raise ValueError(f"cannot save a map hashed with {getattr(function, '__name__', function)}: "
+                         "only the SNAPSHOT_HASH_FUNCTIONS can be recorded")
+    if isinstance(m, MappedSCHashMap):
+        kind, payload = _SC, m._data
+    elif isinstance(m, shared_hash_map.SharedHashMap):
+        # the block already is an OA payload
+        kind, payload = _OA, m._data[:m._counts[shared_hash_map._DATA_END]]
+    elif isinstance(m, hash_map_sc.HashMap):
+        kind, payload = _SC, _sc_payload(m)
+    elif isinstance(m, hash_map_oa.HashMap):
+        kind, payload = _OA, _oa_payload(m)
+    else:
+        raise TypeError("only hash_map_sc and hash_map_oa HashMaps can be saved")
+
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(_FILE_HEADER.pack(_FILE_MAGIC, kind, SNAPSHOT_HASH_FUNCTIONS.index(function),
+                                     sys.byteorder == 'big'))
+        file.write(payload)
+    os.replace(temporary, path)
+
+
+def open_snapshot(path: str):
+    """
+    Map the snapshot at path into memory and return it as a read-only map
+    (a MappedSCHashMap or MappedOAHashMap) with the same lookups as the
+    map that was saved. Nothing is read up front: get and contains_key
+    probe the mapped pages directly and unpickle only the value they return.
+    Call close (or use the map as a context manager) when done.
+    """
+    with open(path, 'rb') as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapping)
+    try:
+        magic, kind, function_id, big_endian = _FILE_HEADER.unpack_from(view)
+        if magic != _FILE_MAGIC:
+            raise ValueError(f"{path} is not a HashMap snapshot")
+        if big_endian != (sys.byteorder == 'big'):
+            raise ValueError(f"{path} was saved on a machine of the other byte order")
+        cls = MappedSCHashMap if kind == _SC else MappedOAHashMap
+        return cls(mapping, view, view[_FILE_HEADER.size:], SNAPSHOT_HASH_FUNCTIONS[function_id])
+    except BaseException:
+        view.release()
+        mapping.close()
+        raise
+
+
+def _decode_records(payload: memoryview, key_offsets: list, value_offsets: list) -> (list, list):
+    """Return the keys and the values of the records at the given offsets of a payload, decoded in one pass each"""
+    data = bytes(payload)  # one copy: slicing bytes is much cheaper than slicing the mapping
+    unpack = shared_hash_map._LENGTH.unpack_from
+    keys = [str(data[offset + 4:offset + 4 + unpack(data, offset)[0]], 'utf-8') for offset in key_offsets]
+    values = [pickle.loads(data[offset + 4:offset + 4 + unpack(data, offset)[0]]) for offset in value_offsets]
+    return keys, values
+
+
+def load_snapshot(path: str):
+    """
+    Return a new, ordinary hash_map_sc or hash_map_oa HashMap holding the
+    snapshot at path, slot for slot as it was saved. Cached hashes are
+    reused, so the hash function is never called.
+    """
+    with open_snapshot(path) as mapped:
+        return _load_mapped(mapped)
+
+
+def _load_mapped(mapped):
+    """Return a new HashMap holding the table of a mapped snapshot (see load_snapshot)"""
+    hashes = mapped._hashes.tolist()
+    # start from a small map: resizing the empty table to the saved
+    # capacity allocates it in one go, where the constructor would add
+    # one bucket at a time
+    if isinstance(mapped, MappedSCHashMap):
+        m = hash_map_sc.HashMap(11, mapped._hash_function, mapped._max_load_factor,
+                                mapped._min_load_factor, mapped._power_of_two)
+    else:
+        m = hash_map_oa.HashMap(11, mapped._hash_function, mapped._power_of_two,
+                                mapped._probing, mapped._max_load_factor)
+    m.resize_table(mapped._capacity)
+    m._resize_count = 0
+
+    if isinstance(mapped, MappedSCHashMap):
+        m._min_capacity = mapped._min_capacity
+        keys, values = _decode_records(mapped._data, mapped._keys.tolist(), mapped._values.tolist())
+        indices = m._bucket_indices(hashes)
+        buckets = m._buckets.unchecked()
+        # backwards, since nodes are linked in at the head of their chain
+        for i, index in zip(range(mapped._size - 1, -1, -1), reversed(indices)):
+            buckets[index].insert_node(SLNode(keys[i], values[i], None, hashes[i]))
+        m._size = mapped._size
+        m._empty_count = m._capacity - len(set(indices))
+        return m
+
+    key_offsets = mapped._keys.tolist()
+    live = [i for i, offset in enumerate(key_offsets) if offset > shared_hash_map._TOMBSTONE]
+    value_offsets = mapped._values.tolist()
+    keys, values = _decode_records(mapped._data, [key_offsets[i] for i in live],
+                                   [value_offsets[i] for i in live])
+    buckets = m._buckets.unchecked()
+    for i, key, value in zip(live, keys, values):
+        buckets[i] = HashEntry(key, value, hashes[i])
+    for i, offset in enumerate(key_offsets):
+        if offset == shared_hash_map._TOMBSTONE:
+            buckets[i] = mapped._entry(i)
+    m._size = mapped._size
+    m._tombstones = mapped._tombstones
+    return m
+
+
+class MappedSCHashMap(hash_map_sc.HashMap):
+    def __init__(self, mapping: mmap.mmap, view: memoryview, payload: memoryview, function) -> None:
+        """
+        Initialize a read-only separate chaining map over the payload of a
+        mapped snapshot (use open_snapshot rather than calling this).
+        A bucket's entries are a contiguous run of the hash and offset
+        arrays, so a lookup walks the run instead of a chain.
+        """
+        magic, capacity, size, power_of_two, min_capacity, max_load_factor, min_load_factor = \
+            _SC_HEADER.unpack_from(payload)
+        if magic != _SC_MAGIC:
+            raise ValueError("not a separate chaining snapshot")
+        self._mapping, self._view, self._data = mapping, view, payload
+        self._hash_function = function
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self._shift = 64 - self._mask.bit_length()
+        self._power_of_two = bool(power_of_two)
+        self._size = size
+        self._max_load_factor = max_load_factor
+        self._min_load_factor = min_load_factor
+        self._min_capacity = min_capacity
+        self._resize_count = 0
+        self._stats = None
+        self._empty_count = None  # counted on first use
+        self._old_table = None
+        self._modifications = 0
+
+        start = _SC_HEADER.size
+        self._starts = payload[start:start + 8 * (capacity + 1)].cast('Q')
+        start += 8 * (capacity + 1)
+        self._hashes = payload[start:start + 8 * size].cast('Q')
+        self._keys = payload[start + 8 * size:start + 16 * size].cast('Q')
+        self._values = payload[start + 16 * size:start + 24 * size].cast('Q')
+
+    def close(self) -> None:
+        """Unmap the snapshot (the map cannot be used afterwards)"""
+        if self._mapping is not None:
+            for view in (self._starts, self._hashes, self._keys, self._values, self._data, self._view):
+                view.release()
+            self._mapping.close()
+            self._mapping = None
+
+    def __enter__(self) -> "MappedSCHashMap":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _read_only(self, *args) -> None:
+        """Raise RuntimeError: a mapped snapshot cannot be changed"""
+        raise RuntimeError("a mapped snapshot is read-only")
+
+    put = remove = clear = resize_table = put_many = remove_many = _read_only
+
+    def _find(self, key: str, hash: int, index: int = None) -> int:
+        """Return the position of key among the entries, or -1; index is the bucket of hash, if already known"""
+        if index is None:
+            index = self._bucket_index(hash)
+        hashes = self._hashes
+        key_data = None  # encoded on the first hash match
+        for i in range(self._starts[index], self._starts[index + 1]):
+            if hashes[i] == hash:
+                if key_data is None:
+                    key_data = key.encode()
+                if _record_at(self._data, self._keys[i]) == key_data:
+                    return i
+        return -1
+
+    def _pair(self, i: int) -> (str, object):
+        """Return the key and (a copy of) the value of the entry at position i"""
+        return (str(_record_at(self._data, self._keys[i]), 'utf-8'),
+                pickle.loads(_record_at(self._data, self._values[i])))
+
+    # ------------------------------------------------------------------ #
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        (in the format of hash_map_sc.HashMap)
+        """
+        out = ''
+        buckets = self.get_buckets()
+        for i in range(buckets.length()):
+            out += str(i) + ': ' + str(buckets[i]) + '\n'
+        return out
+
+    def get(self, key: str):
+        """
+        This method (named get) returns (a copy of) the value associated with the given key, read from the mapped snapshot. If the key does not exist in the hash map, the method returns None.
+        """
+        i = self._find(key, self._hash_function(key))
+        return None if i < 0 else pickle.loads(_record_at(self._data, self._values[i]))
+
+    def contains_key(self, key: str) -> bool:
+        """
+        This method (named contains_key) returns True if the given key exists in the hash map, and False otherwise.
+        """
+        return self._find(key, self._hash_function(key)) >= 0
+
+    def get_many(self, keys) -> list:
+        """
+        Return a list with the value of every key of an iterable, in order
+        (None for missing keys), hashing all keys in one batch.
+        """
+        keys = list(keys)
+        hashes = hash_many(self._hash_function, keys)
+        values = []
+        for key, hash, index in zip(keys, hashes, self._bucket_indices(hashes)):
+            i = self._find(key, hash, index)
+            values.append(None if i < 0 else pickle.loads(_record_at(self._data, self._values[i])))
+        return values
+
+    def empty_buckets(self) -> int:
+        """
+        This method (named empty_buckets) returns the number of empty buckets in the hash table.
+        The snapshot cannot change, so the buckets are only counted by the first call.
+        """
+        if self._empty_count is None:
+            starts = self._starts
+            self._empty_count = sum(1 for index in range(self._capacity)
+                                    if starts[index] == starts[index + 1])
+        return self._empty_count
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        This method (named get_keys_and_values) returns a DynamicArray of tuples containing all the key/value pairs in the hash map.
+        """
+        return DynamicArray([self._pair(i) for i in range(self._size)])
+
+    def get_buckets(self) -> DynamicArray:
+        """
+        This method (named get_buckets) returns a DynamicArray of LinkedLists (copies) containing all the key/value pairs in the hash map.
+        """
+        buckets = DynamicArray()
+        for index in range(self._capacity):
+            bucket = LinkedList()
+            for i in range(self._starts[index + 1] - 1, self._starts[index] - 1, -1):
+                bucket.insert(*self._pair(i), self._hashes[i])
+            buckets.append(bucket)
+        return buckets
+
+    def _nodes(self):
+        """Yield every entry of the snapshot as a node (holding copies of the key and value), bucket by bucket"""
+        for i in range(self._size):
+            yield SLNode(*self._pair(i), None, self._hashes[i])
+
+    def __iter__(self):
+        """
+        This method (named __iter__) returns an iterator over (copies of) the nodes in the hash map.
+        """
+        return self._nodes()
+
+
+class MappedOAHashMap(shared_hash_map.SharedHashMap):
+    def __init__(self, mapping: mmap.mmap, view: memoryview, payload: memoryview, function) -> None:
+        """
+        Initialize a read-only open addressing map over the payload of a
+        mapped snapshot (use open_snapshot rather than calling this). The
+        payload is laid out as a SharedHashMap block, whose lookups run on
+        it unchanged.
+        """
+        magic, _, _, _, _, _, power_of_two, probing, max_load_factor = shared_hash_map._HEADER.unpack_from(payload)
+        if magic != shared_hash_map._MAGIC:
+            raise ValueError("not an open addressing snapshot")
+        self._hash_function = function
+        self._set_options(hash_map_oa.PROBING_STRATEGIES[probing], bool(power_of_two), max_load_factor)
+        self._writable = False
+        self._block = None
+        self._mapping, self._view = mapping, view
+        self._map_buffer(payload)
+
+    def close(self) -> None:
+        """Unmap the snapshot (the map cannot be used afterwards)"""
+        if self._mapping is not None:
+            self._release_views()
+            self._data.release()
+            self._view.release()
+            self._mapping.close()
+            self._mapping = None
+
+    def _check_writable(self) -> None:
+        """Raise RuntimeError: a mapped snapshot cannot be changed"""
+        raise RuntimeError("a mapped snapshot is read-only")
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import random
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'map.snapshot')
+
+    print("\nSnapshot - save/open example 1")
+    print("------------------------------")
+    m = hash_map_sc.HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+    m.remove('str0')
+    save_snapshot(m, path)
+    with open_snapshot(path) as mapped:
+        print(type(mapped).__name__, mapped.get_size(), mapped.get_capacity(), mapped.empty_buckets(),
+              round(mapped.table_load(), 2))
+        print(mapped.get('str0'), mapped.get('str1'), mapped.contains_key('str1'), mapped.contains_key('str0'))
+        print(str(mapped) == str(m))
+
+    print("\nSnapshot - save/open example 2")
+    print("------------------------------")
+    m = hash_map_oa.HashMap(10, hash_function_2)
+    for i in range(5):
+        m.put(str(i), str(i * 24))
+    m.remove('0')
+    m.remove('4')
+    save_snapshot(m, path)
+    with open_snapshot(path) as mapped:
+        print(mapped)
+        for item in mapped:
+            print('K:', item.key, 'V:', item.value)
+        try:
+            mapped.put('5', '120')
+        except RuntimeError as error:
+            print(error)
+
+    print("\nSnapshot - round trips")
+    print("----------------------")
+    # random maps of every kind must come back with the same answers, and
+    # load_snapshot must restore them slot for slot
+    rnd = random.Random(7)
+    options = [('sc', {}), ('sc', {'power_of_two': True})] + [
+        ('oa', {'probing': probing, 'power_of_two': power_of_two})
+        for probing in hash_map_oa.PROBING_STRATEGIES for power_of_two in (False, True)]
+    for map_type, kwargs in options:
+        function = rnd.choice(SNAPSHOT_HASH_FUNCTIONS)
+        module = hash_map_sc if map_type == 'sc' else hash_map_oa
+        m = module.HashMap(11, function, **kwargs)
+        expected = {}
+        for _ in range(2000):
+            key = 'k' + str(rnd.randrange(800))
+            if rnd.random() < 0.7:
+                value = rnd.choice([rnd.random(), key, None, (1, key)])
+                m.put(key, value)
+                expected[key] = value
+            else:
+                m.remove(key)
+                expected.pop(key, None)
+        save_snapshot(m, path)
+        probe = ['k' + str(i) for i in range(900)]
+        with open_snapshot(path) as mapped:
+            same = (mapped.get_many(probe) == [expected.get(key) for key in probe]
+                    and all(mapped.contains_key(key) == (key in expected) for key in probe)
+                    and dict(mapped.items()) == expected
+                    and mapped.empty_buckets() == m.empty_buckets())
+        loaded = load_snapshot(path)
+        if map_type == 'sc':
+            restored = str(loaded) == str(m)
+        else:
+            # a snapshot keeps where tombstones are, not what they held
+            slots = [[None if entry is None else 'TS' if entry.is_tombstone else (entry.key, entry.value)
+                      for entry in table._buckets.unchecked()] for table in (loaded, m)]
+            restored = slots[0] == slots[1] and loaded._tombstones == m._tombstones
+        restored = restored and loaded.get_size() == m.get_size()
+        loaded.put('new', 1)
+        print(f"{map_type} {kwargs!s:<55} {function.__name__:<22} mapped: {same} loaded: {restored}")
+
+    os.remove(path)
+    os.rmdir(directory)
@@ -0,0 +1,171 @@
+# Course: CS261 - Data Structures
+# Assignment: Assignment 6: HashMap Implementation
+# Description: Streaming ingestion of CSV and JSON Lines files into the separate chaining (hash_map_sc.py) and open
+# addressing (hash_map_oa.py) hash maps. The readers are generators that parse one row at a time from a buffered
+# file, and stream_into feeds their (key, value) pairs to the map's put_many a batch at a time, so memory is bounded
+# by the map and one batch, never by the size of the input file.
+
+
+import csv
+import itertools
+import json
+
+from a6_include import hash_function_1
+
+
+# bytes read from the file at a time
+READ_BUFFER = 1 << 20
+
+
+def read_csv(path: str,
+             key=0,
+             value=1,
+             header: bool = False,
+             delimiter: str = ',',
+             convert: callable = None,
+             encoding: str = 'utf-8'):
+    """
+    Yield a (key, value) pair for every row of a CSV file, parsing one row
+    at a time. key and value select columns by index, or by name if the
+    file has a header row; value=None yields the whole row (a list) as the
+    value. convert, if given, is applied to every value.
+    """
+    if not header and any(isinstance(column, str) for column in (key, value)):
+        raise ValueError(f"{path}: columns can only be named if the file has a header row")
+    with open(path, newline='', encoding=encoding, buffering=READ_BUFFER) as file:
+        rows = csv.reader(file, delimiter=delimiter)
+        if header:
+            names = next(rows, [])
+            try:
+                key, value = (names.index(column) if isinstance(column, str) else column
+                              for column in (key, value))
+            except ValueError as error:
+                raise ValueError(f"{path}: no such column ({error})") from None
+        for row in rows:
+            if not row:
+                continue  # blank line
+            try:
+                pair = row[key], (row if value is None else row[value])
+            except IndexError:
+                raise ValueError(f"{path}:{rows.line_num}: row has {len(row)} columns") from None
+            yield pair if convert is None else (pair[0], convert(pair[1]))
+
+
+def read_jsonl(path: str,
+               key: str = 'key',
+               value: str = 'value',
+               convert: callable = None,
+               encoding: str = 'utf-8'):
+    """
+    Yield a (key, value) pair for every line of a JSON Lines file (one JSON
+    object per line), parsing one line at a time. key and value name the
+    fields to use; value=None yields the whole object as the value. Keys
+    that are not strings are converted with str. convert, if given, is
+    applied to every value.
+    """
+    with open(path, encoding=encoding, buffering=READ_BUFFER) as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue  # blank line
+            try:
+                record = json.loads(line)
+                pair = str(record[key]), (record if value is None else record[value])
+            except (ValueError, KeyError, TypeError) as error:
+                raise ValueError(f"{path}:{line_number}: {error!r}") from None
+            yield pair if convert is None else (pair[0], convert(pair[1]))
+
+
+def batches(pairs, size: int):
+    """Yield the items of an iterable as lists of (at most) size items"""
+    if size < 1:
+        raise ValueError("size must be at least 1")
+    pairs = iter(pairs)
+    while True:
+        batch = list(itertools.islice(pairs, size))
+        if not batch:
+            return
+        yield batch
+
+
+def stream_into(m, pairs, batch_size: int = 10000) -> int:
+    """
+    Put every (key, value) pair of an iterable (such as read_csv or
+    read_jsonl) into the HashMap m, batch_size pairs at a time through its
+    put_many, and return the number of pairs put. Later pairs overwrite
+    earlier ones with the same key, as repeated puts would.
+    """
+    count = 0
+    for batch in batches(pairs, batch_size):
+        m.put_many(batch)
+        count += len(batch)
+    return count
+
+
+def load_file(m, path: str, batch_size: int = 10000, **reader_options) -> int:
+    """
+    Stream a .csv or .jsonl (or .ndjson) file into the HashMap m (see
+    stream_into), passing reader_options to read_csv or read_jsonl, and
+    return the number of rows put
+    """
+    if path.endswith('.csv'):
+        pairs = read_csv(path, **reader_options)
+    elif path.endswith(('.jsonl', '.ndjson')):
+        pairs = read_jsonl(path, **reader_options)
+    else:
+        raise ValueError(f"{path}: expected a .csv, .jsonl or .ndjson file")
+    return stream_into(m, pairs, batch_size)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    import hash_map_oa
+    import hash_map_sc
+
+    directory = tempfile.mkdtemp()
+    csv_path = os.path.join(directory, 'rows.csv')
+    jsonl_path = os.path.join(directory, 'rows.jsonl')
+    with open(csv_path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['name', 'count', 'note'])
+        for i in range(1000):
+            writer.writerow(['str' + str(i), i * 100, 'has, a comma' if i % 7 == 0 else ''])
+        writer.writerow(['str0', 1, 'repeated key'])
+    with open(jsonl_path, 'w') as file:
+        for i in range(1000):
+            file.write(json.dumps({'id': i, 'tags': ['t' + str(i % 3)]}) + '\n')
+        file.write('\n')
+
+    print("\nStream - CSV example 1")
+    print("----------------------")
+    m = hash_map_sc.HashMap(11, hash_function_1)
+    rows = load_file(m, csv_path, batch_size=64, key='name', value='count', header=True, convert=int)
+    print(rows, m.get_size(), m.get('str0'), m.get('str999'), m.get_capacity())
+
+    print("\nStream - CSV example 2 (whole rows)")
+    print("-----------------------------------")
+    m = hash_map_oa.HashMap(11, hash_function_1)
+    rows = stream_into(m, read_csv(csv_path, key=0, value=None, header=True), batch_size=100)
+    print(rows, m.get_size(), m.get('str7'), m.get('name'))
+
+    print("\nStream - JSONL example 1")
+    print("------------------------")
+    m = hash_map_oa.HashMap(11, hash_function_1, probing='linear')
+    rows = load_file(m, jsonl_path, key='id', value='tags')
+    print(rows, m.get_size(), m.get('0'), m.get('998'))
+
+    print("\nStream - malformed input")
+    print("------------------------")
+    with open(jsonl_path, 'a') as file:
+        file.write('{"id": 5\n')
+    try:
+        load_file(hash_map_sc.HashMap(), jsonl_path, key='id', value='tags')
+    except ValueError as error:
+        print(str(error).replace(directory, '...'))
+
+    os.remove(csv_path)
+    os.remove(jsonl_path)
+    os.rmdir(directory)